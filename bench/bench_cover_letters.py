@@ -0,0 +1,119 @@
+"""
+Benchmark for cover letter generation (cover_letter/make_letters.py).
+
+Generates a synthetic companies CSV, renders one letter per row with
+render_docx_template and reports time per stage (one-off template parse,
+per-letter load/clone, rewrite -- placeholders and bold in one pass per
+paragraph -- save, and with --pdf the wait for one PdfConverter), letters/sec
+and peak RSS. --cli also times the real `make_letters.py --csv` run end to
+end (including interpreter startup).
+
+    python bench/bench_cover_letters.py --companies 200
+    python bench/bench_cover_letters.py --companies 50 --pdf --json bench_cover.json
+"""
+import argparse
+import csv
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "cover_letter"))
+
+import make_letters  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def write_companies(path: Path, n: int):
+    positions = ["Software Engineer", "Quant Researcher", "Data Analyst", "Product Manager"]
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["company", "position"])
+        for i in range(n):
+            w.writerow([f"Company {i} Holdings", positions[i % len(positions)]])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--companies", type=int, default=100)
+    ap.add_argument("--template", default=str(ROOT / "cover_letter" / "templates" / "cover_letter.docx"))
+    ap.add_argument("--pdf", action="store_true", help="Also time PDF export (needs docx2pdf + Word)")
+    ap.add_argument("--cli", action="store_true", help="Also time make_letters.py --csv end to end")
+    ap.add_argument("--reparse", action="store_true",
+                    help="Parse the template for every letter (pre-DocxTemplate behaviour) instead of once")
+    ap.add_argument("--json", help="Also write results to this JSON file")
+    args = ap.parse_args()
+
+    template = Path(args.template)
+    timings = {}
+    with tempfile.TemporaryDirectory(prefix="bench-cover-") as tmpdir:
+        tmp = Path(tmpdir)
+        companies = tmp / "companies.csv"
+        write_companies(companies, args.companies)
+        outdir = tmp / "out"
+        outdir.mkdir()
+
+        t0 = time.perf_counter()
+        if args.reparse:
+            source = template
+        else:
+            source = make_letters.DocxTemplate(template)
+            timings["parse"] = time.perf_counter() - t0
+        conv = make_letters.PdfConverter() if args.pdf else None
+        with companies.open(newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                out_docx = outdir / f"{row['company']}.docx"
+                make_letters.render_docx_template(
+                    source, row, out_docx, bold_list=make_letters.DEFAULT_ALWAYS_BOLD, timings=timings
+                )
+                if conv is not None:
+                    conv.submit(out_docx)
+        if conv is not None:
+            t = time.perf_counter()
+            conv.close()
+            timings["pdf wait"] = time.perf_counter() - t  # conversion left after the last letter rendered
+        elapsed = time.perf_counter() - t0
+        rss = peak_rss_mb()
+
+        cli_seconds = None
+        if args.cli:
+            cmd = [sys.executable, str(ROOT / "cover_letter" / "make_letters.py"),
+                   "--template", str(template), "--csv", str(companies), "--outdir", str(tmp / "cli")]
+            if args.pdf:
+                cmd.append("--pdf")
+            t = time.perf_counter()
+            subprocess.run(cmd, check=True)
+            cli_seconds = time.perf_counter() - t
+
+    n = args.companies
+    print(f"{n} letters from {template.name}: {elapsed:.2f}s, {n / elapsed:.1f} letters/sec, peak RSS {rss:.0f} MB\n")
+    print(f"{'stage':<10} {'total s':>9} {'ms/letter':>10} {'share':>7}")
+    for stage, secs in timings.items():
+        print(f"{stage:<10} {secs:>9.3f} {secs / n * 1000:>10.2f} {secs / elapsed:>7.0%}")
+    if cli_seconds is not None:
+        print(f"\nmake_letters.py --csv: {cli_seconds:.2f}s ({n / cli_seconds:.1f} letters/sec)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "args": vars(args), "python": sys.version.split()[0],
+            "seconds": round(elapsed, 3), "letters_per_sec": round(n / elapsed, 2), "peak_rss_mb": round(rss, 1),
+            "stages": {k: round(v, 4) for k, v in timings.items()},
+            "cli_seconds": None if cli_seconds is None else round(cli_seconds, 3),
+        }, indent=2))
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Throughput benchmark for the mailer send path, against a local SMTPS sink.
+
+Generates synthetic prospects and runs:
+  - send_mail, new connection per message (the old behaviour)
+  - send_mail over one SMTPSession
+  - SendEngine with each --workers count
+  - the full `outreach/mailer_gmail.py` CLI loop (subprocess, so it includes
+    interpreter startup)
+
+and reports msgs/sec, p50/p99 per-message latency, and the connection and
+login counts seen by the sink. Rate limiting is off (rate=0, jitter=0) so
+the numbers show the send path itself.
+
+    python bench/bench_mailer.py --messages 300 --latency 20 --workers 1 4 8
+    python bench/bench_mailer.py --json bench_mailer.json   # keep results per release
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from smtp_sink import SMTPSink  # noqa: E402
+
+TEMPLATE = "Hi {first_name},\n\nI'm interested in the {role} role at {company}.\n\nBest,\nBench\n"
+
+
+def write_prospects(path: Path, n: int):
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["first_name", "last_name", "company", "role", "company_domain", "cced"])
+        for i in range(n):
+            w.writerow([f"First{i}", f"Last{i}", f"Company {i % 50}", "Analyst", f"example{i % 50}.com", "False"])
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def result(name, n, elapsed, latencies, sink):
+    stats = sink.stats()
+    return {
+        "scenario": name,
+        "messages": n,
+        "seconds": round(elapsed, 3),
+        "msgs_per_sec": round(n / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "connections": stats["connections"],
+        "logins": stats["logins"],
+        "delivered": stats["messages"],
+        "failures": stats["failures"],
+    }
+
+
+def bench_per_message_connection(mailer, msgs, sink):
+    sink.reset()
+    lat = []
+    t0 = time.perf_counter()
+    for m in msgs:
+        t = time.perf_counter()
+        try:
+            mailer.send_mail(m["to"], m["subject"], m["body"], cced=m["cc_flag"])
+        except Exception:
+            continue
+        lat.append(time.perf_counter() - t)
+    return result("send_mail, connection per message", len(msgs), time.perf_counter() - t0, lat, sink)
+
+
+def bench_session(mailer, msgs, sink):
+    sink.reset()
+    lat = []
+    t0 = time.perf_counter()
+    with mailer.SMTPSession() as smtp:
+        for m in msgs:
+            t = time.perf_counter()
+            try:
+                mailer.send_mail(m["to"], m["subject"], m["body"], cced=m["cc_flag"], session=smtp)
+            except Exception:
+                continue
+            lat.append(time.perf_counter() - t)
+    return result("send_mail + SMTPSession", len(msgs), time.perf_counter() - t0, lat, sink)
+
+
+def bench_engine(mailer, msgs, sink, workers):
+    sink.reset()
+    lat = []
+
+    def started(m):
+        m["_t0"] = time.perf_counter()
+
+    def sent(m):
+        lat.append(time.perf_counter() - m["_t0"])
+
+    t0 = time.perf_counter()
+    with mailer.SendEngine(workers=workers, rate=0, jitter=0, on_start=started, on_sent=sent) as engine:
+        for m in msgs:
+            engine.submit(dict(m))
+    return result(f"SendEngine, {workers} workers", len(msgs), time.perf_counter() - t0, lat, sink)
+
+
+def bench_cli(contacts: Path, template: Path, tmp: Path, sink, workers):
+    sink.reset()
+    log = tmp / f"cli-{workers}.db"
+    env = {**os.environ, **sink.env()}
+    cmd = [sys.executable, str(ROOT / "outreach" / "mailer_gmail.py"),
+           "--template", str(template), "--contacts", str(contacts), "--log", str(log),
+           "--workers", str(workers), "--rate", "0", "--jitter", "0"]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True, env=env, cwd=ROOT, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - t0
+    n = sum(1 for _ in contacts.open()) - 1
+    return result(f"mailer_gmail.py CLI, {workers} workers", n, elapsed, [], sink)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--messages", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=10.0, help="Injected server latency per message, ms")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of messages the sink rejects")
+    ap.add_argument("--drop-every", type=int, default=0, help="Sink hangs up after N messages per connection")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--skip-baseline", action="store_true", help="Skip the connection-per-message run (slow)")
+    ap.add_argument("--skip-cli", action="store_true")
+    ap.add_argument("--json", help="Also write results to this JSON file")
+    args = ap.parse_args()
+
+    with SMTPSink(latency=args.latency / 1000, fail_rate=args.fail_rate, drop_every=args.drop_every) as sink, \
+            tempfile.TemporaryDirectory(prefix="bench-mailer-") as tmpdir:
+        tmp = Path(tmpdir)
+        os.environ.update(sink.env())  # before importing the mailer, which reads them at import
+        from outreach import mailer_gmail as mailer
+
+        contacts, template = tmp / "prospects.csv", tmp / "bench.tpl.txt"
+        write_prospects(contacts, args.messages)
+        template.write_text(TEMPLATE, encoding="utf-8")
+        msgs = [mailer.compose_email_from_row(r, template, False, row_template=False)
+                for r in mailer.load_prospects_from_path(contacts)]
+
+        results = []
+        if not args.skip_baseline:
+            results.append(bench_per_message_connection(mailer, msgs, sink))
+        results.append(bench_session(mailer, msgs, sink))
+        for w in args.workers:
+            results.append(bench_engine(mailer, msgs, sink, w))
+        if not args.skip_cli:
+            for w in args.workers:
+                results.append(bench_cli(contacts, template, tmp, sink, w))
+
+    print(f"{args.messages} messages, {args.latency:g} ms server latency, fail rate {args.fail_rate:g}\n")
+    print(f"{'scenario':<40} {'msg/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'conns':>6} {'logins':>6} {'fail':>5}")
+    for r in results:
+        p50 = "-" if r["p50_ms"] is None else f"{r['p50_ms']:.1f}"
+        p99 = "-" if r["p99_ms"] is None else f"{r['p99_ms']:.1f}"
+        print(f"{r['scenario']:<40} {r['msgs_per_sec']:>8.1f} {p50:>8} {p99:>8} "
+              f"{r['connections']:>6} {r['logins']:>6} {r['failures']:>5}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "args": vars(args), "python": sys.version.split()[0], "results": results,
+        }, indent=2))
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Cold-start budget for the command-line entry points.
+
+Runs each command under `python -X importtime` a few times, keeps the
+fastest run, and fails if its total import time is over budget or if a
+module that should only be imported by the command that needs it (InquirerPy,
+pydantic, python-docx, ...) shows up at startup. The forbidden-module check
+doesn't depend on machine speed, so it catches most regressions even where
+the timing budget has to be scaled.
+
+    python bench/check_startup.py             # exit 1 if anything is over budget
+    python bench/check_startup.py --scale 2   # slow machine: double every budget
+    python bench/check_startup.py --json startup.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (name, args after `python -X importtime`, budget in ms, modules that must not be imported)
+CHECKS = [
+    ("import cli", ["-c", "import cli"], 150,
+     ("InquirerPy", "pydantic", "yaml", "rich", "docx", "jinja2", "docx2pdf")),
+    ("cli.py --help", ["cli.py", "--help"], 400,
+     ("InquirerPy", "pydantic", "yaml", "docx", "jinja2", "docx2pdf")),
+    ("make_letters.py --help", ["cover_letter/make_letters.py", "--help"], 120,
+     ("docx", "lxml", "jinja2", "docx2pdf")),
+    ("mailer_gmail.py --help", ["outreach/mailer_gmail.py", "--help"], 180, ()),
+]
+
+
+def measure(args):
+    """Import time of one run: (total ms of top-level imports, set of top-level package names imported)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    total_us, packages = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        module = name[1:]  # nesting is shown as extra indentation
+        if not module.startswith(" "):
+            total_us += int(cumulative)
+        packages.add(module.strip().split(".")[0])
+    return total_us / 1000, packages
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5, help="Runs per command; the fastest counts")
+    ap.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow or loaded machines)")
+    ap.add_argument("--json", help="Also write results to this JSON file")
+    args = ap.parse_args()
+
+    results, failed = [], False
+    print(f"{'command':<26} {'import ms':>10} {'budget':>8}  result")
+    for name, cmd, budget, forbidden in CHECKS:
+        runs = [measure(cmd) for _ in range(args.runs)]
+        best = min(ms for ms, _ in runs)
+        leaked = sorted(set(forbidden) & runs[0][1])
+        limit = budget * args.scale
+        ok = best <= limit and not leaked
+        failed |= not ok
+        verdict = "ok" if ok else "OVER BUDGET" if not leaked else f"imports {', '.join(leaked)}"
+        print(f"{name:<26} {best:>10.1f} {limit:>8.0f}  {verdict}")
+        results.append({"command": name, "import_ms": round(best, 1), "budget_ms": limit, "leaked": leaked, "ok": ok})
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2))
+        print(f"\nWrote {args.json}")
+    if failed:
+        print("\nStartup budget exceeded; `python -X importtime <command> 2>&1 | sort -t'|' -k2 -n` shows what to defer.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Tiny local SMTP(S) sink for benchmarking the mailer.
+
+Speaks just enough ESMTP for smtplib (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT,
+DATA, NOOP, RSET, QUIT), accepts any credentials and throws the messages
+away. Optional implicit TLS (like smtp.gmail.com:465), injected per-message
+latency, random failures and dropped connections. Counts connections,
+logins and messages so a benchmark can see how often we reconnect.
+
+    sink = SMTPSink(latency=0.02, fail_rate=0.01, tls=True).start()
+    ... point SMTP_HOST / SMTP_PORT / SMTP_CAFILE at sink.host, sink.port, sink.cafile ...
+    sink.stop(); print(sink.stats())
+
+Run directly to keep a sink up for manual testing:
+    python bench/smtp_sink.py --port 2465 --latency 20
+"""
+import argparse
+import random
+import shutil
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def make_self_signed_cert(out_dir: Path):
+    """Write a localhost cert/key pair with the openssl CLI; returns (certfile, keyfile)."""
+    if shutil.which("openssl") is None:
+        raise RuntimeError("openssl not found; run the sink with tls=False")
+    cert, key = Path(out_dir) / "sink.crt", Path(out_dir) / "sink.key"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        sink = self.server.sink
+        if sink.ssl_ctx is not None:
+            self.request = sink.ssl_ctx.wrap_socket(self.request, server_side=True)
+        super().setup()
+
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+        self.wfile.flush()
+
+    def _readline(self):
+        raw = self.rfile.readline()
+        if not raw:
+            return None  # client went away
+        return raw.decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        sink._count("connections")
+        self._reply("220 localhost ESMTP bench sink")
+        in_session = 0
+        while True:
+            try:
+                line = self._readline()
+            except (ConnectionError, ssl.SSLError):
+                return
+            if line is None:
+                return
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250-localhost")
+                self._reply("250-AUTH PLAIN LOGIN")
+                self._reply("250 SIZE 35882577")
+            elif verb == "AUTH":
+                parts = line.split()
+                if len(parts) > 1 and parts[1].upper() == "LOGIN":
+                    self._reply("334 VXNlcm5hbWU6")
+                    self._readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self._readline()
+                elif len(parts) == 2:  # AUTH PLAIN without initial response
+                    self._reply("334 ")
+                    self._readline()
+                sink._count("logins")
+                self._reply("235 2.7.0 Accepted")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                if sink.latency:
+                    time.sleep(sink.latency)
+                if sink.fail_rate and random.random() < sink.fail_rate:
+                    sink._count("failures")
+                    self._reply("451 4.3.0 Injected failure")
+                    continue
+                sink._count("messages")
+                in_session += 1
+                self._reply("250 2.0.0 OK queued")
+                if sink.drop_every and in_session >= sink.drop_every:
+                    sink._count("drops")
+                    return  # hang up without QUIT, like a server-side idle timeout
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 5.5.2 Command not recognized")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Threaded local SMTP server; see the module docstring."""
+    def __init__(self, host="127.0.0.1", port=0, tls=True, latency=0.0, fail_rate=0.0, drop_every=0):
+        self.host = host
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.drop_every = drop_every
+        self._counts = {"connections": 0, "logins": 0, "messages": 0, "failures": 0, "drops": 0}
+        self._lock = threading.Lock()
+        self._tmp = None
+        self.cafile = None
+        self.ssl_ctx = None
+        if tls:
+            self._tmp = tempfile.TemporaryDirectory(prefix="smtp-sink-")
+            cert, key = make_self_signed_cert(Path(self._tmp.name))
+            self.ssl_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            self.ssl_ctx.load_cert_chain(cert, key)
+            self.cafile = str(cert)
+        self._server = _Server((host, port), _Handler)
+        self._server.sink = self
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            for k in self._counts:
+                self._counts[k] = 0
+
+    def env(self) -> dict:
+        """Environment that points outreach/mailer_gmail.py at this sink."""
+        env = {"SMTP_HOST": "localhost" if self.host == "127.0.0.1" else self.host, "SMTP_PORT": str(self.port),
+               "GMAIL_USER": "bench@example.com", "GMAIL_APP_PASS": "bench", "GMAIL_NAME": "Bench"}
+        if self.cafile:
+            env["SMTP_CAFILE"] = self.cafile
+        return env
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local SMTP(S) sink for benchmarks")
+    ap.add_argument("--port", type=int, default=2465)
+    ap.add_argument("--no-tls", action="store_true", help="Plain SMTP instead of implicit TLS")
+    ap.add_argument("--latency", type=float, default=0.0, help="Per-message delay in ms")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of messages to reject with 451")
+    ap.add_argument("--drop-every", type=int, default=0, help="Hang up after N messages per connection")
+    args = ap.parse_args()
+
+    sink = SMTPSink(port=args.port, tls=not args.no_tls, latency=args.latency / 1000,
+                    fail_rate=args.fail_rate, drop_every=args.drop_every).start()
+    print(f"SMTP sink on {sink.host}:{sink.port} (tls={'no' if args.no_tls else 'yes'})")
+    for k, v in sink.env().items():
+        print(f"  export {k}={v}")
+    try:
+        while True:
+            time.sleep(5)
+            print(sink.stats())
+    except KeyboardInterrupt:
+        sink.stop()
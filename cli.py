@@ -1,14 +1,21 @@
 from __future__ import annotations
 
-import sys
 import subprocess
 from pathlib import Path
 import typer
 from typer.models import OptionInfo
-from rich import print as rprint
-from InquirerPy import inquirer
-import yaml
-from pydantic import BaseModel
+
+# rich, InquirerPy, yaml and pydantic are imported by the commands that use
+# them: `--help` and non-interactive commands run hundreds of times a day from
+# scripts. bench/check_startup.py keeps this honest.
+
+def rprint(*args, **kwargs):
+    from rich import print as _rprint
+    _rprint(*args, **kwargs)
+
+def _inquirer():
+    from InquirerPy import inquirer
+    return inquirer
 
 
 def _norm_opt(v, default=None):
@@ -19,28 +26,51 @@ def _norm_opt(v, default=None):
 app = typer.Typer(help="Email + cover letter automation, but friendly.")
 
 # ----- config -----
-class Paths(BaseModel):
-    cover_template: str
-    cover_outdir: str
-    email_log: str
-    email_template_dir: str
-    contacts_csv: str
-
-class Defaults(BaseModel):
-    pdf: bool = True
-    cc_myself: bool = False
-
-class Config(BaseModel):
-    sender_name: str
-    sender_email: str
-    paths: Paths
-    defaults: Defaults
-
-def load_config(cfg_path: str = "config.yaml") -> Config:
+def _config_model():
+    """The pydantic model for config.yaml (built on first use; pydantic is slow to import)."""
+    from pydantic import BaseModel
+
+    class Paths(BaseModel):
+        cover_template: str
+        cover_outdir: str
+        email_log: str
+        email_template_dir: str
+        contacts_csv: str
+
+    class Defaults(BaseModel):
+        pdf: bool = True
+        cc_myself: bool = False
+
+    class Send(BaseModel):
+        workers: int = 1
+        rate: float = 0.5
+        burst: int = 1
+        jitter: float = 1.0
+
+    class Config(BaseModel):
+        sender_name: str
+        sender_email: str
+        paths: Paths
+        defaults: Defaults
+        send: Send = Send()
+
+    return Config
+
+def load_config(cfg_path: str = "config.yaml"):
+    import yaml
     with open(cfg_path, "r") as f:
-        return Config(**yaml.safe_load(f))
+        return _config_model()(**yaml.safe_load(f))
 
-CFG = load_config()
+class _LazyConfig:
+    """Stands in for the Config: config.yaml is read on first attribute access, not at import."""
+    _cfg = None
+
+    def __getattr__(self, name):
+        if self._cfg is None:
+            self._cfg = load_config()
+        return getattr(self._cfg, name)
+
+CFG = _LazyConfig()
 
 
 
@@ -65,39 +95,45 @@ def cover_make(
     template: str = typer.Option(None, help="Path to .docx template"),
     outdir: str = typer.Option(None, help="Output directory"),
     pdf: bool = typer.Option(None, help="Export PDF"),
-    open_out: bool = typer.Option(True, help="Reveal output folder")
+    open_out: bool = typer.Option(True, help="Reveal output folder"),
+    csv: str = typer.Option(None, "--csv", help="Batch: CSV with headers company,position"),
+    jobs: int = typer.Option(1, help="Batch: processes to render with"),
+    force: bool = typer.Option(False, help="Rebuild letters that are already up to date"),
 ):
     template = _norm_opt(template, CFG.paths.cover_template)
     outdir = _norm_opt(outdir, CFG.paths.cover_outdir)
     pdf = CFG.defaults.pdf if pdf is None else pdf
-
-    # basic validation for wizard typos
-    company = (company or "").strip()
-    position = (position or "").strip()
-    if not company or company.startswith("source "):
-        typer.secho("Please enter a valid company name.", fg=typer.colors.RED)
-        raise typer.Exit(1)
-    if not position:
-        typer.secho("Please enter a valid position.", fg=typer.colors.RED)
-        raise typer.Exit(1)
+    csv = _norm_opt(csv)
+    jobs = _norm_opt(jobs, 1)
+    force = _norm_opt(force, False)
 
     _check(template, "file")
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-
-    # Call your existing script exactly like you did before:
-    cmd = [
-        sys.executable,  # was "python3"
-        "cover_letter/make_letters.py",
-        "--template", template,
-        "--company", company,
-        "--position", position,
-        "--outdir", outdir,
-    ]
-    if pdf:
-        cmd.append("--pdf")
-
-    rprint(f"[bold]Running:[/bold] {' '.join(cmd)}")
-    subprocess.run(cmd, check=True)
+    if csv:
+        _check(csv, "file")
+        companies = None
+    else:
+        # basic validation for wizard typos
+        company = (company or "").strip()
+        position = (position or "").strip()
+        if not company or company.startswith("source "):
+            typer.secho("Please enter a valid company name.", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        if not position:
+            typer.secho("Please enter a valid position.", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        companies = [(company, position)]
+
+    from cover_letter import make_letters
+    try:
+        res = make_letters.generate_letters(template, outdir, companies=companies, csv_path=csv,
+                                            pdf=pdf, jobs=jobs, force=force)
+    except RuntimeError as e:  # no PDF converter
+        typer.secho(str(e), fg=typer.colors.RED)
+        raise typer.Exit(2)
+    rprint(make_letters.summarize_letters(res))
+    # in a batch the letters that worked are still there, so only a single letter fails the command
+    if res["failed"] and not csv:
+        raise typer.Exit(1)
 
     if open_out:
         # macOS: open Finder. On Linux use 'xdg-open', Windows 'start'.
@@ -108,17 +144,17 @@ def cover_wizard():
     """Interactive cover letter generator (no auto-defaults)."""
     # Always start blank
     while True:
-        company = inquirer.text(message="Company name:").execute().strip()
+        company = _inquirer().text(message="Company name:").execute().strip()
         if company and not company.startswith("source "):
             break
         typer.secho("Please enter a valid company name.", fg=typer.colors.RED)
 
-    position = inquirer.text(
+    position = _inquirer().text(
         message="Position title:",
         default="Software Engineer"
     ).execute().strip()
 
-    as_pdf = inquirer.confirm(
+    as_pdf = _inquirer().confirm(
         message="Export to PDF?",
         default=CFG.defaults.pdf
     ).execute()
@@ -130,18 +166,7 @@ def cover_wizard():
 email = typer.Typer(help="Send or preview emails")
 app.add_typer(email, name="email")
 
-@email.command("send")
-def email_send(
-    template: str = typer.Option(None, help="Which template file to use (.txt/.md) or a directory of templates"),
-    contacts: str = typer.Option(None, help="CSV of contacts to send to"),
-    cc_myself: bool = typer.Option(None, help="CC me on every email"),
-    dry_run: bool = typer.Option(False, help="Preview without sending"),
-):
-    # normalize OptionInfo -> real values or defaults
-    template = _norm_opt(template, CFG.paths.email_template_dir)
-    contacts = _norm_opt(contacts, CFG.paths.contacts_csv)
-    cc = _norm_opt(cc_myself, CFG.defaults.cc_myself)
-
+def _email_inputs(template: str, contacts: str):
     # ensure files/choices
     tpath = Path(template)
     if tpath.is_dir():
@@ -149,7 +174,7 @@ def email_send(
         if not choices:
             typer.secho("No templates found in email_template_dir", fg=typer.colors.RED)
             raise typer.Exit(1)
-        picked = inquirer.select(message="Choose an email template:", choices=choices).execute()
+        picked = _inquirer().select(message="Choose an email template:", choices=choices).execute()
         template = str(tpath / picked)
 
     if not Path(template).is_file():
@@ -158,20 +183,102 @@ def email_send(
     if not Path(contacts).is_file():
         typer.secho(f"Contacts CSV not found: {contacts}", fg=typer.colors.RED)
         raise typer.Exit(1)
+    return template, contacts
 
-    cmd = [
-        sys.executable,  # use the same venv Python
-        "outreach/mailer_gmail.py",
-        "--template", template,
-        "--contacts", contacts,
-        "--cc", "1" if cc else "0",
-        "--log", CFG.paths.email_log,
-    ]
-    if dry_run:
-        cmd.append("--dry-run")
+@email.command("send")
+def email_send(
+    template: str = typer.Option(None, help="Which template file to use (.txt/.md) or a directory of templates"),
+    contacts: str = typer.Option(None, help="CSV of contacts to send to"),
+    cc_myself: bool = typer.Option(None, help="CC me on every email"),
+    dry_run: bool = typer.Option(False, help="Preview without sending"),
+    workers: int = typer.Option(None, help="Parallel SMTP connections"),
+    rate: float = typer.Option(None, help="Max messages/sec across all workers (0 = unlimited)"),
+    burst: int = typer.Option(None, help="Messages allowed back to back"),
+    jitter: float = typer.Option(None, help="Extra random delay per message (seconds)"),
+    use_async: bool = typer.Option(False, "--async", help="Use the asyncio send pipeline (ignored with --dry-run)"),
+):
+    # normalize OptionInfo -> real values or defaults
+    template = _norm_opt(template, CFG.paths.email_template_dir)
+    contacts = _norm_opt(contacts, CFG.paths.contacts_csv)
+    cc = _norm_opt(cc_myself, CFG.defaults.cc_myself)
+    workers = _norm_opt(workers, CFG.send.workers)
+    rate = _norm_opt(rate, CFG.send.rate)
+    burst = _norm_opt(burst, CFG.send.burst)
+    jitter = _norm_opt(jitter, CFG.send.jitter)
+
+    template, contacts = _email_inputs(template, contacts)
+
+    from outreach import mailer_gmail as mailer
+    mailer.flush_on_sigterm()  # so the sent log is flushed even if we're killed
+    rates = dict(workers=workers, rate=rate, burst=burst, jitter=jitter)
+    try:
+        if _norm_opt(use_async, False) and not dry_run:
+            import asyncio
+            stats = asyncio.run(mailer.send_batch_async(
+                Path(contacts), Path(template), Path(CFG.paths.email_log), cc_default=cc, row_template=False, **rates,
+            ))
+            rprint(f"Sent {stats['sent']} emails, skipped {stats['already']} already sent, {stats['failed']} failed.")
+            return
+
+        def confirm(msg):
+            return typer.confirm("Send this email?", default=False)
+
+        res = mailer.send_batch(
+            Path(contacts), Path(template), Path(CFG.paths.email_log), cc, row_template=False, **rates,
+            on_message=mailer.print_preview, confirm=confirm if dry_run else None,
+            on_skip=lambda key: print(f"Skipping {key} (already sent)."),
+        )
+    except (ValueError, RuntimeError) as e:  # preflight, or couldn't connect / log in
+        typer.secho(str(e), fg=typer.colors.RED)
+        raise typer.Exit(1)
+    rprint(f"Sent {res['sent']} emails ({len(res['failed'])} failed, {res['declined']} skipped by you).")
+    print("Pipeline throughput:\n" + res["report"])
 
-    rprint(f"[bold]Running:[/bold] {' '.join(cmd)}")
-    subprocess.run(cmd, check=True)
+@email.command("render")
+def email_render(
+    outbox: str = typer.Option(..., help="Folder to write .eml files to, or a .mbox file"),
+    template: str = typer.Option(None, help="Which template file to use (.txt/.md) or a directory of templates"),
+    contacts: str = typer.Option(None, help="CSV of contacts"),
+    cc_myself: bool = typer.Option(None, help="CC me on every email"),
+    jobs: int = typer.Option(1, help="Processes to render with"),
+):
+    """Render every email that would be sent, without sending (review it, then send-outbox)."""
+    template = _norm_opt(template, CFG.paths.email_template_dir)
+    contacts = _norm_opt(contacts, CFG.paths.contacts_csv)
+    cc = _norm_opt(cc_myself, CFG.defaults.cc_myself)
+    template, contacts = _email_inputs(template, contacts)
+
+    from outreach import mailer_gmail as mailer
+    errors, _ = mailer.preflight(Path(contacts), Path(template), row_template=False)
+    if errors:
+        typer.secho("Preflight failed:\n" + "\n".join(errors), fg=typer.colors.RED)
+        raise typer.Exit(1)
+    with mailer.open_sent_log(Path(CFG.paths.email_log)) as sent_log:
+        n = mailer.render_outbox(Path(contacts), Path(template), Path(outbox), sent_log=sent_log,
+                                 cc_default=cc, row_template=False, jobs=jobs)
+    rprint(f"Rendered {n} emails to {outbox}.")
+
+@email.command("send-outbox")
+def email_send_outbox(
+    outbox: str = typer.Argument(..., help="Folder of .eml files written by 'email render'"),
+    workers: int = typer.Option(None, help="Parallel SMTP connections"),
+    rate: float = typer.Option(None, help="Max messages/sec across all workers (0 = unlimited)"),
+    burst: int = typer.Option(None, help="Messages allowed back to back"),
+    jitter: float = typer.Option(None, help="Extra random delay per message (seconds)"),
+):
+    """Send the .eml files left in a rendered outbox (delete the ones you don't want first)."""
+    _check(outbox, "dir")
+    from outreach import mailer_gmail as mailer
+    try:
+        res = mailer.send_outbox(
+            Path(outbox), Path(CFG.paths.email_log),
+            workers=_norm_opt(workers, CFG.send.workers), rate=_norm_opt(rate, CFG.send.rate),
+            burst=_norm_opt(burst, CFG.send.burst), jitter=_norm_opt(jitter, CFG.send.jitter),
+        )
+    except RuntimeError as e:  # couldn't connect / log in
+        typer.secho(str(e), fg=typer.colors.RED)
+        raise typer.Exit(1)
+    rprint(f"Sent {res['sent']} emails from {outbox} ({len(res['failed'])} failed).")
 
 @email.command("wizard")
 def email_wizard():
@@ -182,8 +289,13 @@ def email_wizard():
 @app.command("log")
 def log_show():
     """Open the send log in your default CSV viewer."""
-    _check(CFG.paths.email_log, "file")
-    subprocess.run(["open", CFG.paths.email_log])
+    from outreach.mailer_gmail import viewable_sent_log
+    try:
+        log = viewable_sent_log(Path(CFG.paths.email_log))  # CSV snapshot if it's the SQLite ledger
+    except FileNotFoundError as e:
+        typer.secho(f"Missing file: {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    subprocess.run(["open", str(log)])
 
 if __name__ == "__main__":
     app()
@@ -1,16 +1,27 @@
-import argparse, csv, os, sys, re
+import argparse, copy, csv, functools, hashlib, json, os, sys, re, time, queue, shutil, signal, subprocess, tempfile, threading
 from pathlib import Path
-from docx2pdf import convert
 
-# Optional deps: jinja2, python-docx
-try:
-    from jinja2 import Template
-except ImportError:
-    Template = None
-try:
-    from docx import Document
-except ImportError:
-    Document = None
+# Optional deps, imported on first use so --help and .txt batches don't pay
+# for them: python-docx, jinja2, docx2pdf (only for --pdf; it runs in a child
+# process, see PdfConverter, so here we only check that it is installed)
+def _load_document(path):
+    try:
+        from docx import Document
+    except ImportError:
+        raise RuntimeError("python-docx not installed. Run: pip install python-docx") from None
+    return Document(str(path))
+
+@functools.lru_cache(maxsize=None)
+def _jinja2():
+    try:
+        import jinja2
+    except ImportError:
+        return None
+    return jinja2
+
+def _have_docx2pdf() -> bool:
+    import importlib.util
+    return importlib.util.find_spec("docx2pdf") is not None
 
 
 DEFAULT_ALWAYS_BOLD = [
@@ -33,15 +44,94 @@ def _merge_spans(spans):
             merged.append((s, e))
     return merged
 
-def _find_all_spans(text: str, phrase: str):
-    spans = []
-    start = 0
-    while True:
-        i = text.find(phrase, start)
-        if i == -1: break
-        spans.append((i, i + len(phrase)))
-        start = i + len(phrase)
-    return spans
+class PhraseMatcher:
+    """
+    Every occurrence of any of `phrases` in one pass over the text.
+
+    Compiled once (see compile_bold_phrases) into an Aho-Corasick automaton
+    with the failure links folded into each state's transition table, so the
+    scan is one dict lookup per character however many phrases there are.
+    spans() reports the longest phrase ending at each position it matches;
+    overlapping and nested hits are left for _merge_spans to union, so the
+    result is "bold every character covered by some phrase".
+
+    For short lists a str.find per phrase (which runs in C) is still faster
+    than stepping the automaton in Python -- the crossover measured ~130
+    phrases -- so below AUTOMATON_MIN_PHRASES that is what spans() does,
+    with the same all-occurrences semantics.
+    """
+    AUTOMATON_MIN_PHRASES = 128
+
+    def __init__(self, phrases):
+        self.phrases = tuple(sorted({p for p in phrases if p}))
+        self._delta = self._out = self._first = None
+        if len(self.phrases) >= self.AUTOMATON_MIN_PHRASES:
+            self._compile()
+
+    def _compile(self):
+        goto, out, fail = [{}], [0], [0]
+        for phrase in self.phrases:
+            node = 0
+            for ch in phrase:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    goto.append({}); out.append(0); fail.append(0)
+                    nxt = goto[node][ch] = len(goto) - 1
+                node = nxt
+            out[node] = max(out[node], len(phrase))
+
+        # BFS: fail links, then each state's full transition table (its own
+        # edges over its fail state's, which is complete by then)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        todo = list(goto[0].values())
+        for node in todo:
+            for ch, child in goto[node].items():
+                f = fail[node]
+                fail[child] = delta[f].get(ch, 0)
+                out[child] = max(out[child], out[fail[child]])
+                todo.append(child)
+            delta[node] = {**delta[fail[node]], **goto[node]}
+        self._delta, self._out = delta, out
+        # from the root state we can skip straight to a character that starts a phrase
+        self._first = re.compile("[" + "".join(re.escape(ch) for ch in goto[0]) + "]")
+
+    def spans(self, text: str):
+        if self._delta is None:
+            spans = []
+            for phrase in self.phrases:
+                i = text.find(phrase)
+                while i != -1:
+                    spans.append((i, i + len(phrase)))
+                    i = text.find(phrase, i + 1)
+            return spans
+
+        delta, out, search = self._delta, self._out, self._first.search
+        spans, node, i, n = [], 0, 0, len(text)
+        while i < n:
+            if node == 0:
+                m = search(text, i)
+                if m is None:
+                    break
+                i = m.start()
+            node = delta[node].get(text[i], 0)
+            i += 1
+            if out[node]:
+                spans.append((i - out[node], i))
+        return spans
+
+    def __len__(self):
+        return len(self.phrases)
+
+
+_MATCHERS = {}
+
+def compile_bold_phrases(bold_list=None) -> PhraseMatcher:
+    """DEFAULT_ALWAYS_BOLD + `bold_list` as a PhraseMatcher, built once per distinct list."""
+    key = frozenset(list(bold_list or []) + DEFAULT_ALWAYS_BOLD)
+    matcher = _MATCHERS.get(key)
+    if matcher is None:
+        matcher = _MATCHERS[key] = PhraseMatcher(key)
+    return matcher
 
 def _first_sentence_span(text: str):
     """
@@ -54,121 +144,625 @@ def _first_sentence_span(text: str):
         return (0, len(text)) if text.strip() else None
     return (0, m.end())  # include the punctuation
 
-def _rebuild_paragraph_with_bold(paragraph, bold_spans):
-    text = paragraph.text
-    base_font_name = paragraph.runs[0].font.name if paragraph.runs else None
-    base_font_size = paragraph.runs[0].font.size if paragraph.runs else None
-    for i in range(len(paragraph.runs) - 1, -1, -1):
-        paragraph._p.remove(paragraph.runs[i]._r)
+def _emit_runs(paragraph, text: str, bold_spans):
+    """Replace the paragraph's runs with `text`, bold over `bold_spans`, in the first run's font."""
+    runs = paragraph.runs
+    base_font_name = runs[0].font.name if runs else None
+    base_font_size = runs[0].font.size if runs else None
+    for run in runs:
+        paragraph._p.remove(run._r)
+
+    # Set the properties through python-docx on the first run of each kind, then
+    # copy that <w:rPr> onto the rest: the setters walk the schema every call.
+    props = {}
+    def add(chunk, bold):
+        r = paragraph.add_run(chunk)
+        if bold in props:
+            if props[bold] is not None:
+                r._r.insert(0, copy.deepcopy(props[bold]))
+            return
+        if bold is not None: r.bold = bold
+        if base_font_name: r.font.name = base_font_name
+        if base_font_size: r.font.size = base_font_size
+        props[bold] = r._r.rPr
 
+    if not bold_spans:
+        add(text, None)
+        return
     idx = 0
     for (s, e) in bold_spans:
         if idx < s:
-            r = paragraph.add_run(text[idx:s]); r.bold = False
-            if base_font_name: r.font.name = base_font_name
-            if base_font_size: r.font.size = base_font_size
-        r = paragraph.add_run(text[s:e]); r.bold = True
-        if base_font_name: r.font.name = base_font_name
-        if base_font_size: r.font.size = base_font_size
+            add(text[idx:s], False)
+        add(text[s:e], True)
         idx = e
     if idx < len(text):
-        r = paragraph.add_run(text[idx:]); r.bold = False
-        if base_font_name: r.font.name = base_font_name
-        if base_font_size: r.font.size = base_font_size
-
+        add(text[idx:], False)
 
-def bold_phrases_and_first_sentence(paragraph, phrases_to_bold, bold_first_sentence=True):
-    text = paragraph.text
+def _bold_spans(text: str, matcher, bold_first_sentence=True):
     if not text.strip():
-        return
-
+        return []
     spans = []
-    # First sentence
     if bold_first_sentence:
         fs = _first_sentence_span(text)
         if fs:
             spans.append(fs)
+    spans.extend(matcher.spans(text))
+    return _merge_spans(spans)
 
-    # Exact phrases
-    for phrase in phrases_to_bold:
-        if not phrase: continue
-        spans.extend(_find_all_spans(text, phrase))
-
-    spans = _merge_spans(spans)
-    if spans:
-        _rebuild_paragraph_with_bold(paragraph, spans)
-
-
-
-def replace_in_paragraph_runs(paragraph, company_val: str, position_val: str):
-    # Join the paragraph text once, regex-replace, then write back as a single run.
+def rewrite_paragraph(paragraph, substitutions, matcher, bold_first_sentence=True):
+    """
+    Fill placeholders and apply bold rules in one go: read the text once,
+    substitute (`substitutions` is a list of (compiled regex, value)), find
+    bold spans on the result, and rebuild the runs at most once.
+    """
     original = paragraph.text
-    new_text = COMPANY_RE.sub(company_val, original)
-    new_text = POSITION_RE.sub(position_val, new_text)
-    if new_text == original:
-        return
+    text = original
+    if "{{" in text:
+        for pattern, value in substitutions:
+            text = pattern.sub(lambda _m, v=value: v, text)  # literal: no backslash escapes from CSV values
+    spans = _bold_spans(text, matcher, bold_first_sentence)
+    if spans or text != original:
+        _emit_runs(paragraph, text, spans)
 
-    # preserve base font from first run if present
-    base_font_name = paragraph.runs[0].font.name if paragraph.runs else None
-    base_font_size = paragraph.runs[0].font.size if paragraph.runs else None
-
-    for i in range(len(paragraph.runs) - 1, -1, -1):
-        paragraph._p.remove(paragraph.runs[i]._r)
-    r = paragraph.add_run(new_text)
-    if base_font_name: r.font.name = base_font_name
-    if base_font_size: r.font.size = base_font_size
-
-def replace_in_docx(doc, context: dict):
-    company  = context.get("company", "")
-    position = context.get("position", "")
-    for p in doc.paragraphs:
-        replace_in_paragraph_runs(p, company, position)
-    for table in doc.tables:
+def bold_phrases_and_first_sentence(paragraph, phrases_to_bold, bold_first_sentence=True):
+    """`phrases_to_bold` is a PhraseMatcher, or a list of phrases to build one from."""
+    matcher = phrases_to_bold if isinstance(phrases_to_bold, PhraseMatcher) else PhraseMatcher(phrases_to_bold)
+    rewrite_paragraph(paragraph, (), matcher, bold_first_sentence)
+
+def iter_paragraphs(container):
+    """Paragraphs of a document or table cell, then those of its tables, nested tables included."""
+    yield from container.paragraphs
+    for table in container.tables:
+        seen = set()
         for row in table.rows:
             for cell in row.cells:
-                for p in cell.paragraphs:
-                    replace_in_paragraph_runs(p, company, position)
-
-def render_docx_template(template_path: Path, context: dict, out_docx: Path, bold_list=None):
-    if Document is None:
-        raise RuntimeError("python-docx not installed. Run: pip install python-docx")
-    doc = Document(str(template_path))
+                if cell._tc in seen:  # a merged cell comes back once per grid column it spans
+                    continue
+                seen.add(cell._tc)
+                yield from iter_paragraphs(cell)
+
+def _lap(timings, stage, t0):
+    # accumulate seconds per stage when the caller passed a timings dict
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (now - t0)
+    return now
+
+class DocxTemplate:
+    """
+    A .docx template parsed once per batch. Rendering only ever touches the
+    main document part (word/document.xml), so each letter gets a deep copy
+    of that one XML tree instead of unzipping and parsing the whole package
+    again; every other part is shared and saved unchanged.
+    """
+    def __init__(self, template_path: Path):
+        self.path = Path(template_path)
+        self._part = _load_document(self.path).part
+        self._pristine = copy.deepcopy(self._part._element)
 
-    # 1) Replace placeholders everywhere
-    context_local = {"company": context.get("company",""), "position": context.get("position","")}
-    replace_in_docx(doc, context_local)
+    def new_document(self):
+        """A Document for one letter, starting from the untouched template body."""
+        self._part._element = copy.deepcopy(self._pristine)
+        return self._part.document
 
-    # 2) Bold rules
-    phrases = list(set((bold_list or []) + DEFAULT_ALWAYS_BOLD))
 
-    # Pass 1: paragraphs
-    for p in doc.paragraphs:
-        bold_phrases_and_first_sentence(p, phrases, bold_first_sentence=True)
+def render_docx_template(template_path, context: dict, out_docx: Path, bold_list=None, timings=None):
+    """
+    Fill {{company}}/{{position}}, bold the first sentence + phrases, save.
+    `template_path` may be a path or a DocxTemplate (parse once, render many).
+    Pass a dict as `timings` to get seconds per stage added to it
+    (load, rewrite, save) -- used by bench/bench_cover_letters.py.
+    """
+    t = time.perf_counter()
+    if isinstance(template_path, DocxTemplate):
+        doc = template_path.new_document()
+    else:
+        doc = _load_document(template_path)
+    t = _lap(timings, "load", t)
 
-    # Pass 2: tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for p in cell.paragraphs:
-                    bold_phrases_and_first_sentence(p, phrases, bold_first_sentence=True)
+    # Placeholders and bold rules in one pass over body, tables and nested tables
+    # (bold_list may already be a compiled PhraseMatcher)
+    substitutions = [(COMPANY_RE, context.get("company", "")), (POSITION_RE, context.get("position", ""))]
+    matcher = bold_list if isinstance(bold_list, PhraseMatcher) else compile_bold_phrases(bold_list)
+    for p in iter_paragraphs(doc):
+        rewrite_paragraph(p, substitutions, matcher, bold_first_sentence=True)
+    t = _lap(timings, "rewrite", t)
 
     doc.save(str(out_docx))
+    _lap(timings, "save", t)
+
+# --------- PDF export ---------
+SOFFICE_CANDIDATES = ("soffice", "libreoffice", "/Applications/LibreOffice.app/Contents/MacOS/soffice")
+PDF_BACKENDS = ("auto", "word", "libreoffice")
+
+def find_soffice():
+    for c in SOFFICE_CANDIDATES:
+        p = shutil.which(c)
+        if p:
+            return p
+    return None
+
+def pick_pdf_backend(name: str = "auto") -> str:
+    """'word' (docx2pdf, needs Word on macOS/Windows) or 'libreoffice'; 'auto' prefers Word."""
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend {name!r}; choose from {', '.join(PDF_BACKENDS)}")
+    if name in ("auto", "word") and sys.platform in ("darwin", "win32") and _have_docx2pdf():
+        return "word"
+    if name == "word":
+        raise RuntimeError("docx2pdf not installed (or no Word on this OS). Run: pip install docx2pdf")
+    if find_soffice():
+        return "libreoffice"
+    raise RuntimeError("No PDF converter found: pip install docx2pdf (needs Word) or install LibreOffice")
+
+def _run_killable(cmd, timeout):
+    """subprocess.run with a timeout that also kills grandchildren (soffice is a wrapper around soffice.bin)."""
+    posix = os.name == "posix"
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=posix)
+    try:
+        out, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if posix:
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+        proc.communicate()
+        raise
+    return proc.returncode, out.decode("utf-8", "replace")
+
+
+class PdfConverter:
+    """
+    Batch .docx -> PDF export that pays the office startup once per chunk
+    rather than once per file.
+
+    submit() queues a file and returns immediately. Each worker thread takes
+    everything queued so far (up to `chunk` files) and converts it with one
+    converter run: LibreOffice with a private profile per worker (so a small
+    pool doesn't fight over one profile lock), or Word via docx2pdf's folder
+    mode (always one worker). A run that outlives `timeout` + `per_file`
+    seconds per file is killed, the profile reset, and its unfinished files
+    retried one by one. close() waits for the queue to drain and returns
+    {docx path: error or None}.
+    """
+    def __init__(self, backend="auto", workers=1, chunk=50, timeout=60.0, per_file=10.0, linger=0.5):
+        self.backend = pick_pdf_backend(backend)
+        self.soffice = find_soffice() if self.backend == "libreoffice" else None
+        self.workers = 1 if self.backend == "word" else max(1, workers)
+        self.chunk = max(1, chunk)
+        self.timeout = timeout
+        self.per_file = per_file
+        self.linger = linger
+        self.results = {}
+        self.startups = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._q = queue.Queue()
+        self._tmp = tempfile.TemporaryDirectory(prefix="pdfconv-")
+        self._threads = [
+            threading.Thread(target=self._worker, args=(i,), name=f"pdf-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, docx, out_pdf=None):
+        docx = Path(docx)
+        self._q.put((docx, Path(out_pdf) if out_pdf else docx.with_suffix(".pdf")))
+
+    def close(self) -> dict:
+        for _ in self._threads:
+            self._q.put(None)
+        for t in self._threads:
+            t.join()
+        self._tmp.cleanup()
+        return dict(self.results)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _worker(self, wid):
+        done = False
+        while not done:
+            item = self._q.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.chunk:
+                try:
+                    item = self._q.get(timeout=self.linger)
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            self._convert_batch(wid, batch)
+
+    def _set(self, docx, error):
+        with self._lock:
+            self.results[str(docx)] = error
+
+    def _convert_batch(self, wid, batch):
+        try:
+            missing, output = self._convert(wid, batch)
+        except subprocess.TimeoutExpired:
+            with self._lock:
+                self.restarts += 1
+            shutil.rmtree(self._profile(wid), ignore_errors=True)  # a killed soffice can leave it locked
+            missing = self._collect(wid, batch)
+            if len(batch) == 1:
+                self._set(batch[0][0], f"PDF conversion timed out after {self._budget(1):.0f}s")
+                return
+            for item in missing:
+                self._convert_batch(wid, [item])
+            return
+        except OSError as e:
+            missing, output = batch, str(e)
+        detail = output.strip().splitlines()[-1] if output.strip() else "no output"
+        for docx, _ in missing:
+            self._set(docx, f"PDF conversion failed ({self.backend}): {detail}")
+
+    def _budget(self, n):
+        return self.timeout + self.per_file * n
+
+    def _profile(self, wid) -> Path:
+        return Path(self._tmp.name) / f"profile-{wid}"
+
+    def _dirs(self, wid):
+        stage, out = Path(self._tmp.name) / f"stage-{wid}", Path(self._tmp.name) / f"out-{wid}"
+        return stage, out
+
+    def _convert(self, wid, batch):
+        """One converter run over `batch`; returns (items with no PDF, converter output)."""
+        stage, out = self._dirs(wid)
+        for d in (stage, out):
+            shutil.rmtree(d, ignore_errors=True)
+            d.mkdir(parents=True)
+        # Stage under index names: only this batch is in the folder (Word converts
+        # the whole folder) and two letters with the same stem can't collide.
+        staged = []
+        for i, (docx, _) in enumerate(batch):
+            dst = stage / f"{i:05d}.docx"
+            try:
+                os.link(docx, dst)
+            except OSError:
+                shutil.copyfile(docx, dst)
+            staged.append(str(dst))
+        if self.backend == "libreoffice":
+            cmd = [self.soffice, f"-env:UserInstallation={self._profile(wid).as_uri()}",
+                   "--headless", "--norestore", "--nologo", "--nodefault",
+                   "--convert-to", "pdf", "--outdir", str(out), *staged]
+        else:
+            cmd = [sys.executable, "-c",
+                   "import sys; from docx2pdf import convert; convert(sys.argv[1], sys.argv[2])",
+                   str(stage), str(out)]
+        with self._lock:
+            self.startups += 1
+        _, output = _run_killable(cmd, self._budget(len(batch)))
+        return self._collect(wid, batch), output
+
+    def _collect(self, wid, batch):
+        """Move finished PDFs to their destinations; returns the items that have none."""
+        _, out = self._dirs(wid)
+        missing = []
+        for i, (docx, out_pdf) in enumerate(batch):
+            pdf = out / f"{i:05d}.pdf"
+            if pdf.is_file() and pdf.stat().st_size > 0:
+                shutil.move(str(pdf), str(out_pdf))
+                self._set(docx, None)
+            else:
+                missing.append((docx, out_pdf))
+        return missing
+
+
+def docx_to_pdf(in_docx: Path, out_pdf: Path, backend: str = "auto"):
+    """Convert one file. For batches, keep a PdfConverter open and submit() to it instead."""
+    with PdfConverter(backend) as conv:
+        conv.submit(in_docx, out_pdf)
+    error = conv.results.get(str(Path(in_docx)))
+    if error:
+        raise RuntimeError(error)
+
+_JINJA_ENVS = {}   # template folder -> jinja2.Environment
+_TEXT_CACHE = {}   # path -> ((mtime_ns, size), text), for the no-jinja fallback
+TEXT_PLACEHOLDER_RE = re.compile(r"{{\s*(company|position)\s*}}")
+
+def jinja_env(folder: Path):
+    """
+    Shared Environment for a template folder. Templates are compiled once per
+    process (auto_reload recompiles when the file's mtime changes) and the
+    compiled bytecode is kept in jinja's per-user cache dir, so later runs
+    skip the compile too.
+    """
+    jinja2 = _jinja2()
+    folder = Path(folder).resolve()
+    env = _JINJA_ENVS.get(folder)
+    if env is None:
+        env = _JINJA_ENVS[folder] = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(str(folder)),
+            auto_reload=True,
+            bytecode_cache=jinja2.FileSystemBytecodeCache(),
+        )
+    return env
+
+def _read_text_cached(path: Path) -> str:
+    st = path.stat()
+    sig = (st.st_mtime_ns, st.st_size)
+    hit = _TEXT_CACHE.get(path)
+    if hit is None or hit[0] != sig:
+        hit = _TEXT_CACHE[path] = (sig, path.read_text(encoding="utf-8"))
+    return hit[1]
 
 def render_text_template(template_path: Path, context: dict) -> str:
     """Render a .txt/.md template. Prefer Jinja2 if available, else do simple {{company}} / {{position}} replace."""
-    s = template_path.read_text(encoding="utf-8")
-    if Template is not None:
-        return Template(s).render(**context)
+    template_path = Path(template_path)
+    if _jinja2() is not None:
+        return jinja_env(template_path.parent).get_template(template_path.name).render(**context)
     # fallback: regex replace {{ company }} / {{ position }}
-    s = COMPANY_RE.sub(context.get("company", ""), s)
-    s = POSITION_RE.sub(context.get("position", ""), s)
-    return s
+    s = _read_text_cached(template_path)
+    return TEXT_PLACEHOLDER_RE.sub(lambda m: context.get(m.group(1), ""), s)
+
+def letter_basename(company: str) -> str:
+    safe = company.replace("/", "-").replace("\\", "-").strip()
+    return f"Chris Low {safe} Cover Letter"
+
+def plan_letters(rows):
+    """
+    Turn (row_no, company, position) tuples into jobs with output names fixed
+    up front, in CSV order, so parallel runs name files exactly like serial
+    ones. A company that appears twice gets ' (2)', ' (3)', ... instead of
+    two workers writing the same file.
+    """
+    jobs, used = [], {}
+    for row_no, company, position in rows:
+        base = letter_basename(company)
+        n = used.get(base, 0) + 1
+        used[base] = n
+        jobs.append({"row": row_no, "company": company, "position": position,
+                     "basename": base if n == 1 else f"{base} ({n})"})
+    return jobs
+
+
+# Bump when a code change alters the rendered output, so existing letters are rebuilt.
+GENERATOR_VERSION = "3"
+MANIFEST_NAME = ".letters-manifest.json"
+
+class LetterManifest:
+    """
+    outdir/.letters-manifest.json: output file name -> hash of everything that
+    went into it. A file whose recorded hash matches and which still exists is
+    up to date. Hand edits to an output aren't detected; use --force.
+    """
+    def __init__(self, outdir: Path):
+        self.path = Path(outdir) / MANIFEST_NAME
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.files = data.get("files", {}) if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            self.files = {}
+        self._dirty = False
+
+    def is_current(self, out: Path, digest: str) -> bool:
+        out = Path(out)
+        return self.files.get(out.name) == digest and out.is_file()
+
+    def record(self, out: Path, digest: str):
+        if self.files.get(Path(out).name) != digest:
+            self.files[Path(out).name] = digest
+            self._dirty = True
+
+    def forget(self, out: Path):
+        if self.files.pop(Path(out).name, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": 1, "files": self.files}, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+def batch_digest(tpl: Path, bold_list=None) -> str:
+    """Hash of the inputs shared by every letter in a batch: template bytes, bold phrases, generator version."""
+    h = hashlib.sha256()
+    h.update(Path(tpl).read_bytes())
+    h.update(json.dumps(compile_bold_phrases(bold_list).phrases).encode())
+    h.update(GENERATOR_VERSION.encode())
+    return h.hexdigest()
+
+def letter_digest(batch: str, job: dict) -> str:
+    context = {"company": job["company"], "position": job["position"]}
+    return hashlib.sha256((batch + json.dumps(context, sort_keys=True)).encode()).hexdigest()
+
+
+_DOCX_TEMPLATES = {}  # path -> ((mtime_ns, size), DocxTemplate)
+
+def get_docx_template(path: Path) -> DocxTemplate:
+    """Parsed template for `path`, re-parsed only when the file changes (calls from cli/gui reuse it)."""
+    path = Path(path).resolve()
+    st = path.stat()
+    sig = (st.st_mtime_ns, st.st_size)
+    hit = _DOCX_TEMPLATES.get(path)
+    if hit is None or hit[0] != sig:
+        hit = _DOCX_TEMPLATES[path] = (sig, DocxTemplate(path))
+    return hit[1]
+
+
+_WORKER = {}  # per-process: template path, parsed DocxTemplate, outdir
+
+def _init_worker(tpl: Path, outdir: Path):
+    _WORKER["tpl"] = Path(tpl)
+    _WORKER["outdir"] = Path(outdir)
+    _WORKER["master"] = get_docx_template(tpl) if Path(tpl).suffix.lower() == ".docx" else None
+
+def _render_job(job: dict) -> dict:
+    """Render one letter in this process; errors are returned, not raised, so one bad row can't stop a batch."""
+    tpl, outdir, master = _WORKER["tpl"], _WORKER["outdir"], _WORKER["master"]
+    context = {"company": job["company"], "position": job["position"]}
+    try:
+        if master is not None:
+            out = outdir / f"{job['basename']}.docx"
+            render_docx_template(master, context, out, bold_list=DEFAULT_ALWAYS_BOLD)
+        else:
+            out = outdir / f"{job['basename']}.txt"
+            out.write_text(render_text_template(tpl, context), encoding="utf-8")
+    except Exception as e:
+        return {**job, "out": None, "error": f"{type(e).__name__}: {e}"}
+    return {**job, "out": str(out), "error": None}
+
 
+def generate_batch(tpl: Path, jobs: list, outdir: Path, pdf=False, n_jobs=1, progress=print, force=False,
+                   on_progress=None, cancel=None) -> list:
+    """
+    Render every job (see plan_letters), across `n_jobs` processes if > 1.
+    Each process parses the template once. `pdf` is False, True (a default
+    PdfConverter) or a PdfConverter, which letters are fed to as they finish
+    and which is closed at the end. Letters (and PDFs) the outdir manifest
+    says are up to date are skipped unless `force`. `on_progress(done,
+    total)` follows the letters actually rendered; setting `cancel` (a
+    threading.Event) lets the letters being rendered finish and drops the
+    rest. Returns one result dict per finished job, in job order, with
+    'out', 'error' and 'skipped' filled in.
+    """
+    tpl, outdir = Path(tpl), Path(outdir)
+    conv = PdfConverter() if pdf is True else (pdf or None)
+    ext = ".docx" if tpl.suffix.lower() == ".docx" else ".txt"
+    manifest = LetterManifest(outdir)
+    batch = batch_digest(tpl, DEFAULT_ALWAYS_BOLD)
+
+    results, todo, pdf_queued = [], [], [0]
+
+    def to_pdf(out):
+        conv.submit(out)
+        pdf_queued[0] += 1
+
+    for j in jobs:
+        j = {**j, "hash": letter_digest(batch, j)}
+        out = outdir / f"{j['basename']}{ext}"
+        if not force and manifest.is_current(out, j["hash"]):
+            res = {**j, "out": str(out), "error": None, "skipped": True}
+            results.append(res)
+            if conv is not None and ext == ".docx" and not manifest.is_current(out.with_suffix(".pdf"), j["hash"]):
+                to_pdf(out)
+        else:
+            todo.append(j)
+    if results:
+        progress(f"Skipping {len(results)} up-to-date letter(s) (--force to rebuild)")
+    total, done = len(todo), 0
+
+    def finish(res):
+        nonlocal done
+        done += 1
+        res["skipped"] = False
+        if res["error"] is None:
+            manifest.record(res["out"], res["hash"])
+            if conv is not None and res["out"].endswith(".docx"):
+                to_pdf(res["out"])
+        else:
+            manifest.forget(outdir / f"{res['basename']}{ext}")
+        results.append(res)
+        status = "ok" if res["error"] is None else f"FAILED ({res['error']})"
+        progress(f"[{done}/{total}] row {res['row']} {res['company']}: {status}")
+        if on_progress is not None:
+            on_progress(done, total)
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    try:
+        if n_jobs > 1 and total > 1:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(tpl, outdir)) as pool:
+                futures = [pool.submit(_render_job, j) for j in todo]
+                for fut in as_completed(futures):
+                    if fut.cancelled():
+                        continue
+                    finish(fut.result())
+                    if cancelled():
+                        for f in futures:
+                            f.cancel()  # the ones already running finish; as_completed still yields them
+        else:
+            _init_worker(tpl, outdir)
+            for j in todo:
+                if cancelled():
+                    break
+                finish(_render_job(j))
+        if cancelled():
+            progress(f"Cancelled after {done}/{total} letters.")
+
+        if conv is not None:
+            if pdf_queued[0]:
+                progress(f"Waiting for PDF export ({conv.backend})…")
+            pdf_errors = conv.close()
+            for res in results:
+                if not res["out"] or res["out"] not in pdf_errors:
+                    continue
+                out_pdf = Path(res["out"]).with_suffix(".pdf")
+                error = pdf_errors[res["out"]]
+                if error:
+                    res["error"] = error
+                    manifest.forget(out_pdf)
+                else:
+                    manifest.record(out_pdf, res["hash"])
+            if pdf_errors:
+                ok = sum(1 for e in pdf_errors.values() if e is None)
+                progress(f"PDF: {ok}/{len(pdf_errors)} converted, {conv.startups} converter start(s), {conv.restarts} restart(s)")
+    finally:
+        manifest.save()  # keep what finished even if the batch was interrupted
+    results.sort(key=lambda r: r["row"])
+    return results
+
+
+def read_companies_csv(csv_path: Path):
+    """(row number, company, position) for each CSV row with a company; row 1 is the header."""
+    with open(csv_path, newline="") as f:
+        rows = [
+            (i, (row.get("company") or "").strip(), (row.get("position") or "").strip())
+            for i, row in enumerate(csv.DictReader(f), start=2)
+        ]
+    return [r for r in rows if r[1]]
+
+def generate_letters(template: Path, outdir: Path, companies=None, csv_path: Path = None, pdf=False, jobs=1,
+                     force=False, pdf_backend="auto", pdf_workers=1, pdf_timeout=60.0, progress=print,
+                     on_progress=None, cancel=None) -> dict:
+    """
+    Generate letters for `companies` ((company, position) pairs) or every row
+    of `csv_path` -- what `make_letters.py` does, callable in-process so the
+    parsed template and compiled bold phrases stay cached between calls.
+    `on_progress` and `cancel` are passed to generate_batch. Raises
+    RuntimeError if `pdf` is set and no converter is available.
+
+    Returns {"results": one dict per letter (see generate_batch), "generated",
+    "skipped", "failed": the failed results, "seconds", "outdir"}.
+    """
+    tpl, outdir = Path(template), Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    if csv_path is not None:
+        rows = read_companies_csv(csv_path)
+    else:
+        rows = [(i, (c or "").strip(), (p or "").strip()) for i, (c, p) in enumerate(companies or (), start=1)]
+    planned = plan_letters(rows)
 
-def to_pdf_with_libreoffice(input_path: Path, out_dir: Path):
-    os.system(f'libreoffice --headless --convert-to pdf "{input_path}" --outdir "{out_dir}"')
+    conv = None
+    if pdf and tpl.suffix.lower() == ".docx":
+        conv = PdfConverter(pdf_backend, workers=pdf_workers, timeout=pdf_timeout)
 
-def main():
+    t0 = time.perf_counter()
+    results = generate_batch(tpl, planned, outdir, pdf=conv or False, n_jobs=max(1, jobs), progress=progress,
+                             force=force, on_progress=on_progress, cancel=cancel)
+    failed = [r for r in results if r["error"]]
+    skipped = sum(1 for r in results if r["skipped"] and not r["error"])
+    return {"results": results, "generated": len(results) - skipped - len(failed), "skipped": skipped,
+            "failed": failed, "cancelled": bool(cancel is not None and cancel.is_set()),
+            "seconds": time.perf_counter() - t0, "outdir": str(outdir)}
+
+
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--template", required=True, help="Path to .docx or .txt template")
     ap.add_argument("--company", help="Company name (single run)")
@@ -176,39 +770,37 @@ def main():
     ap.add_argument("--csv", help="CSV with headers: company,position")
     ap.add_argument("--pdf", action="store_true", help="Also export PDF")
     ap.add_argument("--outdir", default="coverletters/out", help="Output directory")
-    args = ap.parse_args()
-
-    tpl = Path(args.template)
-    outdir = Path(args.outdir); outdir.mkdir(parents=True, exist_ok=True)
-
-    def generate_one(company: str, position: str = ""):
-        safe = company.replace("/", "-").replace("\\", "-").strip()
-        basename = f"Chris Low {safe} Cover Letter"
-        context = {"company": company, "position": position}
-
-        if tpl.suffix.lower() == ".docx":
-            out_docx = outdir / f"{basename}.docx"
-            render_docx_template(tpl, context, out_docx, bold_list=DEFAULT_ALWAYS_BOLD)
-            if args.pdf:
-                out_pdf = outdir / f"{basename}.pdf"
-                convert(str(out_docx), str(out_pdf))
-
-        else:
-            out_txt = outdir / f"{basename}.txt"
-            out_txt.write_text(render_text_template(tpl, context), encoding="utf-8")
-
-    if args.company:
-        generate_one(args.company.strip(), args.position.strip())
-    elif args.csv:
-        with open(args.csv, newline="") as f:
-            for row in csv.DictReader(f):
-                company = (row.get("company") or "").strip()
-                position = (row.get("position") or "").strip()
-                if company:
-                    generate_one(company, position)
-    else:
+    ap.add_argument("--jobs", type=int, default=1, help="Processes to render a --csv batch with")
+    ap.add_argument("--force", action="store_true", help="Rebuild letters even if the manifest says they are up to date")
+    ap.add_argument("--pdf-backend", choices=PDF_BACKENDS, default="auto", help="PDF converter (auto prefers Word)")
+    ap.add_argument("--pdf-workers", type=int, default=1, help="LibreOffice instances to convert with")
+    ap.add_argument("--pdf-timeout", type=float, default=60.0, help="Converter startup allowance, seconds (+10s per file)")
+    args = ap.parse_args(argv)
+
+    if not (args.company or args.csv):
         print("Provide --company COMPANY or --csv companies.csv")
-        sys.exit(2)
+        return 2
+    try:
+        res = generate_letters(
+            args.template, args.outdir,
+            companies=[(args.company, args.position)] if args.company else None,
+            csv_path=None if args.company else args.csv,
+            pdf=args.pdf, jobs=args.jobs, force=args.force,
+            pdf_backend=args.pdf_backend, pdf_workers=args.pdf_workers, pdf_timeout=args.pdf_timeout,
+        )
+    except (RuntimeError, OSError) as e:  # no PDF converter, unreadable template or CSV
+        print(e)
+        return 2
+    print(summarize_letters(res))
+    return 1 if res["failed"] else 0
+
+def summarize_letters(res: dict) -> str:
+    built = res["generated"] + len(res["failed"])
+    dt = res["seconds"]
+    lines = [f"Generated {res['generated']}/{built} letters in {dt:.1f}s"
+             f" ({built / dt if dt else 0:.1f}/s), {res['skipped']} up to date -> {res['outdir']}"]
+    lines += [f"  row {r['row']} {r['company']}: {r['error']}" for r in res["failed"]]
+    return "\n".join(lines)
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -1,7 +1,8 @@
 # gui.py
-import os, sys, platform, subprocess, traceback
+import bisect, os, platform, queue, re, subprocess, threading, time, traceback
 from pathlib import Path
 from outreach import mailer_gmail as mailer
+from cover_letter import make_letters
 import csv
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -19,7 +20,7 @@ DEFAULTS = {
         "cover_outdir": "cover_letter/outs",
         "email_template_dir": "outreach/email_templates",
         "contacts_csv": "outreach/prospects.csv",
-        "email_log": "outreach/sent_log.csv",
+        "email_log": "outreach/sent_log.db",
     },
     "defaults": {
         "pdf": True,
@@ -103,81 +104,420 @@ def preview_dialog(parent, msg: dict) -> str:
     return result["val"]
 
 
+# Search index for the contacts editor
+class ContactIndex:
+    """
+    In-memory search over prospects by name, company, domain and template.
+
+    Per row it keeps the lowercased text of each field (substring search
+    scans those, in C, instead of re-reading row dicts) and a sorted
+    (word, row id) list per field for prefix search by bisection. Both are
+    built as rows load and kept current by add()/update()/remove(). As you
+    type, a query that extends the previous one only re-checks the
+    previous matches.
+    """
+    FIELDS = ("name", "company", "domain", "template")
+    WORD_RE = re.compile(r"\w+")
+
+    def __init__(self):
+        self.text = {f: {} for f in self.FIELDS}   # field -> row id -> lowercased value
+        self.text["all"] = {}                      # all four, separated so a match can't span fields
+        self.words = {f: [] for f in self.FIELDS}  # field -> sorted [(word, row id)]
+        self._unsorted = False
+        self._last = None                          # (field, prefix, query, matches) of the last search
+
+    @staticmethod
+    def fields_of(row: dict) -> dict:
+        """The searchable values of a row, lowercased."""
+        name = f"{row.get('first_name') or ''} {row.get('last_name') or ''}".strip()
+        return {"name": name.lower(), "company": (row.get("company") or "").lower(),
+                "domain": (row.get("company_domain") or "").lower(), "template": (row.get("template") or "").lower()}
+
+    def _words(self, value):
+        words = set(self.WORD_RE.findall(value))
+        words.add(value)  # so a prefix can run past the first word ("ann sm")
+        return words
+
+    def add_many(self, items):
+        """Index (row id, row) pairs in bulk; the word lists are sorted on the next prefix search."""
+        for rid, row in items:
+            values = self.fields_of(row)
+            for f, v in values.items():
+                self.text[f][rid] = v
+                self.words[f].extend((w, rid) for w in self._words(v))
+            self.text["all"][rid] = "\x1f".join(values.values())
+        self._unsorted = True
+        self._last = None
+
+    def add(self, rid, row):
+        """Index one row, keeping the word lists sorted."""
+        self.sort()
+        values = self.fields_of(row)
+        for f, v in values.items():
+            self.text[f][rid] = v
+            for w in self._words(v):
+                bisect.insort(self.words[f], (w, rid))
+        self.text["all"][rid] = "\x1f".join(values.values())
+        self._last = None
+
+    def remove(self, rid):
+        self.sort()
+        for f in self.FIELDS:
+            lst = self.words[f]
+            for w in self._words(self.text[f].pop(rid)):
+                i = bisect.bisect_left(lst, (w, rid))
+                if i < len(lst) and lst[i] == (w, rid):
+                    del lst[i]
+        del self.text["all"][rid]
+        self._last = None
+
+    def update(self, rid, row):
+        self.remove(rid)
+        self.add(rid, row)
+
+    def sort(self):
+        """Sort the word lists now (the loader does, so the first prefix search on the Tk thread needn't)."""
+        if self._unsorted:
+            for lst in self.words.values():
+                lst.sort()
+            self._unsorted = False
+
+    def search(self, query, field="all", prefix=False) -> set:
+        """Row ids whose `field` ("all" or one of FIELDS) contains `query`, or has a word starting with it."""
+        q = query.strip().lower()
+        last = self._last
+        if prefix:
+            self.sort()
+            found = set()
+            for f in (self.FIELDS if field == "all" else (field,)):
+                lst = self.words[f]
+                i = bisect.bisect_left(lst, (q,))
+                while i < len(lst) and lst[i][0].startswith(q):
+                    found.add(lst[i][1])
+                    i += 1
+        elif last and last[:2] == (field, prefix) and q.startswith(last[2]):
+            text = self.text[field]
+            found = {rid for rid in last[3] if q in text[rid]}
+        else:
+            found = {rid for rid, v in self.text[field].items() if q in v}
+        self._last = (field, prefix, q, found)
+        return found
+
+
 # Editing prospects.csv
 class ContactsEditor(tk.Toplevel):
-    """Tiny CSV editor for prospects.csv (columns taken from file header)."""
+    """
+    CSV editor for prospects.csv (columns taken from file header).
+
+    Built for very large lists: rows are read in chunks on a background
+    thread, and the Treeview only holds the rows that fit on screen -- a
+    fixed set of "slots" whose values are swapped as you scroll. Rows are
+    kept by a stable id, so add/edit/delete touch one entry instead of
+    rebuilding the table. The filter box and column sort work off a
+    ContactIndex built by the loader thread.
+    """
+    LOAD_CHUNK = 5000   # rows per hand-off from the loader thread
+    ROW_HEIGHT = 20     # Treeview default when the theme doesn't set one; sizes the slot pool
+
     def __init__(self, parent, csv_path: Path):
         super().__init__(parent)
         self.title(f"Edit Prospects — {csv_path.name}")
         self.geometry("1000x560")
         self.csv_path = csv_path
 
-        # read csv
+        # header now (the table needs the columns), rows on the loader thread
         with self.csv_path.open(newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            self.fieldnames = reader.fieldnames or [
+            self.fieldnames = csv.DictReader(f).fieldnames or [
                 "first_name","last_name","company","role","company_domain","cced","template"
             ]
-            self.rows = [r for r in reader]
+        self.rows = {}        # row id -> dict, in file order
+        self.order = []       # all row ids, in the current sort order
+        self.view = []        # row ids shown: self.order narrowed by the filter
+        self.index = ContactIndex()
+        self.sort_col, self.sort_desc = None, False
+        self._next_id = 0
+        self.top = 0          # index in self.view of the first visible row
+        self.selected = None  # row id, kept across scrolling
+        self._dirty = False
+        self._loaded = False
+        self._load_q = queue.Queue()
+        self._closing = threading.Event()
+        self._after = None
 
         # layout
         wrap = ttk.Frame(self, padding=10); wrap.pack(fill="both", expand=True)
         left = ttk.Frame(wrap); left.pack(side="left", fill="both", expand=True)
         right = ttk.Frame(wrap); right.pack(side="left", fill="y", padx=(10,0))
 
-        # table
-        self.tree = ttk.Treeview(left, columns=self.fieldnames, show="headings", height=16)
-        # for col in self.fieldnames:
-        #     self.tree.heading(col, text=col)
-        #     self.tree.column(col, width=170, minwidth=120, anchor="w", stretch=True)
+        # filter bar
+        bar = ttk.Frame(left); bar.pack(fill="x", pady=(0,6))
+        ttk.Label(bar, text="Filter:").pack(side="left")
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(bar, textvariable=self.filter_var, width=32, state="disabled")
+        self.filter_entry.pack(side="left", padx=6)
+        self.filter_field = tk.StringVar(value="all")
+        ttk.Combobox(bar, textvariable=self.filter_field, values=("all", *ContactIndex.FIELDS),
+                     state="readonly", width=10).pack(side="left")
+        self.prefix_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(bar, text="Word starts with", variable=self.prefix_var).pack(side="left", padx=6)
+        for var in (self.filter_var, self.filter_field, self.prefix_var):
+            var.trace_add("write", lambda *_: self._apply_filter())
+
+        # table: slots are the only Treeview items; _render fills them from self.view
+        table = ttk.Frame(left); table.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(table, columns=self.fieldnames, show="headings", height=16, selectmode="browse")
         for col in self.fieldnames:
-            self.tree.heading(col, text=col)
+            self.tree.heading(col, text=col, command=lambda c=col: self._sort_by(c))
             self.tree.column(col, width=120, anchor="w")
-        self.tree.pack(fill="both", expand=True)
-        self._reload_tree()
+        self.vsb = ttk.Scrollbar(table, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.vsb.pack(side="left", fill="y")
+        self.row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or self.ROW_HEIGHT)
+        self.slots = []
+        self._resize_slots(16)
 
         # buttons under table
         btns = ttk.Frame(left); btns.pack(fill="x", pady=(6,0))
-        ttk.Button(btns, text="Add", command=self._add_dialog).pack(side="left")
-        ttk.Button(btns, text="Edit", command=self._edit_dialog).pack(side="left", padx=6)
-        ttk.Button(btns, text="Delete", command=self._delete_selected).pack(side="left")
-        ttk.Button(btns, text="Save", command=self._save).pack(side="right")
+        self.edit_btns = [
+            ttk.Button(btns, text="Add", command=self._add_dialog),
+            ttk.Button(btns, text="Edit", command=self._edit_dialog),
+            ttk.Button(btns, text="Delete", command=self._delete_selected),
+        ]
+        self.edit_btns[0].pack(side="left")
+        self.edit_btns[1].pack(side="left", padx=6)
+        self.edit_btns[2].pack(side="left")
+        self.save_btn = ttk.Button(btns, text="Save", command=self._save)
+        self.save_btn.pack(side="right")
+        self.count_var = tk.StringVar(value="Loading…")
+        ttk.Label(btns, textvariable=self.count_var).pack(side="right", padx=10)
+        for b in (*self.edit_btns, self.save_btn):
+            b.configure(state="disabled")  # until the whole file is in
 
         # quick help / close
-        ttk.Label(right, text="Tips:\n• Double-click a row to Edit\n• cced is True/False\n• Save writes to CSV",
+        ttk.Label(right, text="Tips:\n• Double-click a row to Edit\n• Click a column header to sort\n"
+                              "• cced is True/False\n• Save writes to CSV",
                   justify="left").pack(anchor="nw")
         ttk.Button(right, text="Close", command=self.destroy).pack(side="bottom", pady=8)
 
-        # dbl-click -> edit
+        # dbl-click -> edit; scrolling is ours since the tree only holds one screen
         self.tree.bind("<Double-1>", lambda e: self._edit_dialog())
-
-    def _reload_tree(self):
-        self.tree.delete(*self.tree.get_children())
-        for i, row in enumerate(self.rows):
-            values = [row.get(k, "") for k in self.fieldnames]
-            self.tree.insert("", "end", iid=str(i), values=values)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Configure>", lambda e: self._resize_slots(max(1, e.height // self.row_height - 1)))
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_to(self.top - 3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_to(self.top + 3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-len(self.slots)))
+        self.tree.bind("<Next>", lambda e: self._move_selection(len(self.slots)))
+
+        # the title-bar X must go through destroy() too, or the loader and the poll outlive the window
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+        threading.Thread(target=self._load_rows, name="contacts-load", daemon=True).start()
+        self._after = self.after(20, self._poll_load)
+
+    def destroy(self):
+        self._closing.set()
+        if self._after is not None:
+            self.after_cancel(self._after)
+            self._after = None
+        super().destroy()
+
+    # ---- loading ----
+    def _load_rows(self):
+        """
+        Loader thread: hand (row id, row) pairs over in chunks, indexing them
+        on the way; None marks the end (an exception, a failed read). The Tk
+        thread doesn't search until then, so the index is the loader's alone.
+        """
+        try:
+            with self.csv_path.open(newline="", encoding="utf-8") as f:
+                chunk = []
+                for rid, row in enumerate(csv.DictReader(f)):
+                    chunk.append((rid, row))
+                    if len(chunk) >= self.LOAD_CHUNK:
+                        if self._closing.is_set():
+                            return
+                        self.index.add_many(chunk)
+                        self._load_q.put(chunk)
+                        chunk = []
+                self.index.add_many(chunk)
+                self._load_q.put(chunk)
+            self.index.sort()
+            self._load_q.put(None)
+        except Exception as e:
+            self._load_q.put(e)
+
+    def _poll_load(self):
+        self._after = None
+        while True:
+            try:
+                item = self._load_q.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, Exception):
+                self.count_var.set("Load failed.")
+                messagebox.showerror("Error", f"Could not read {self.csv_path}:\n{item}", parent=self)
+                return
+            if item is None:
+                self._loaded = True
+                self._next_id = len(self.rows)
+                for b in (*self.edit_btns, self.save_btn, self.filter_entry):
+                    b.configure(state="normal")
+                self._update_count()
+                self._render()
+                return
+            for rid, row in item:
+                self.rows[rid] = row
+                self.order.append(rid)
+                self.view.append(rid)
+        self.count_var.set(f"Loading… {len(self.rows):,} rows")
+        self._render()
+        self._after = self.after(20, self._poll_load)
+
+    def _update_count(self):
+        shown = f"{len(self.view):,} of " if len(self.view) != len(self.rows) else ""
+        self.count_var.set(f"{shown}{len(self.rows):,} rows" + (" (unsaved changes)" if self._dirty else ""))
+
+    # ---- filter / sort ----
+    def _apply_filter(self):
+        if not self._loaded:
+            return
+        query = self.filter_var.get()
+        if query.strip():
+            found = self.index.search(query, self.filter_field.get(), self.prefix_var.get())
+            self.view = [rid for rid in self.order if rid in found]
+        else:
+            self.view = list(self.order)
+        self.top = 0
+        self._update_count()
+        self._render()
+
+    def _sort_by(self, col):
+        if not self._loaded:
+            return
+        self.sort_desc = self.sort_col == col and not self.sort_desc
+        self.sort_col = col
+        rows = self.rows
+        self.order.sort(key=lambda rid: (rows[rid].get(col) or "").lower(), reverse=self.sort_desc)
+        for c in self.fieldnames:
+            arrow = (" ▼" if self.sort_desc else " ▲") if c == col else ""
+            self.tree.heading(c, text=c + arrow)
+        self._apply_filter()
+
+    # ---- windowed rendering ----
+    def _resize_slots(self, n):
+        if n == len(self.slots):
+            return
+        while len(self.slots) < n:
+            slot = f"slot{len(self.slots)}"
+            self.tree.insert("", "end", iid=slot)
+            self.slots.append(slot)
+        while len(self.slots) > n:
+            self.tree.delete(self.slots.pop())
+        self._render()
+
+    def _render(self):
+        """Fill the slots from self.view[self.top:] and sync the scrollbar and selection."""
+        total = len(self.view)
+        self.top = max(0, min(self.top, total - len(self.slots)))
+        selected_slot = None
+        for i, slot in enumerate(self.slots):
+            pos = self.top + i
+            if pos < total:
+                rid = self.view[pos]
+                row = self.rows[rid]
+                self.tree.item(slot, values=[row.get(k, "") for k in self.fieldnames])
+                self.tree.move(slot, "", i)  # re-attaches a slot left empty by a shorter list
+                if rid == self.selected:
+                    selected_slot = slot
+            else:
+                self.tree.detach(slot)
+        self.tree.selection_set(selected_slot or ())
+        if total:
+            self.vsb.set(self.top / total, min(1.0, (self.top + len(self.slots)) / total))
+        else:
+            self.vsb.set(0, 1)
+
+    def _scroll_to(self, top):
+        self.top = int(top)
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self.view))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (len(self.slots) if args[2] == "pages" else 1)
+            self._scroll_to(self.top + step)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self._scroll_to(self.top - 3 * delta)
+
+    def _on_select(self, event=None):
+        sel = self.tree.selection()
+        if sel:  # an empty selection comes from _render when the selected row scrolls out of view
+            pos = self.top + self.slots.index(sel[0])
+            if pos < len(self.view):
+                self.selected = self.view[pos]
+
+    def _move_selection(self, step):
+        if not self.view:
+            return "break"
+        try:
+            pos = self.view.index(self.selected) + step
+        except ValueError:
+            pos = self.top
+        pos = max(0, min(pos, len(self.view) - 1))
+        self.selected = self.view[pos]
+        self._show_pos(pos)
+        return "break"
+
+    def _show_pos(self, pos):
+        """Scroll just enough for self.view[pos] to be visible."""
+        if pos < self.top:
+            self.top = pos
+        elif pos >= self.top + len(self.slots):
+            self.top = pos - len(self.slots) + 1
+        self._render()
 
     def _selected_index(self):
-        sel = self.tree.selection()
-        return int(sel[0]) if sel else None
+        return self.selected if self.selected in self.rows else None
 
+    # ---- edits ----
     def _delete_selected(self):
-        idx = self._selected_index()
-        if idx is None: return
-        del self.rows[idx]
-        self._reload_tree()
+        rid = self._selected_index()
+        if rid is None: return
+        del self.rows[rid]
+        self.index.remove(rid)
+        self.order.remove(rid)
+        self.view.remove(rid)
+        self.selected = None
+        self._dirty = True
+        self._update_count()
+        self._render()
 
     def _save(self):
+        if not self._dirty:
+            messagebox.showinfo("Saved", "No changes to save.", parent=self)
+            return
         # normalize booleans for 'cced'
-        for r in self.rows:
+        for r in self.rows.values():
             if "cced" in r:
                 v = str(r.get("cced", "")).strip().lower()
                 r["cced"] = "True" if v in ("true","1","yes","y","t") else "False"
-        with self.csv_path.open("w", newline="", encoding="utf-8") as f:
+        # write next to the real file and swap it in, so a crash mid-save can't truncate the list
+        tmp = self.csv_path.with_suffix(".tmp")
+        with tmp.open("w", newline="", encoding="utf-8") as f:
             writer = csv.DictWriter(f, fieldnames=self.fieldnames)
             writer.writeheader()
-            writer.writerows(self.rows)
-        messagebox.showinfo("Saved", f"Saved {len(self.rows)} rows to:\n{self.csv_path}")
+            writer.writerows(self.rows.values())
+        os.replace(tmp, self.csv_path)
+        self._dirty = False
+        self._update_count()
+        self._render()
+        messagebox.showinfo("Saved", f"Saved {len(self.rows)} rows to:\n{self.csv_path}", parent=self)
 
     # ---- dialogs ----
     def _row_dialog(self, title, initial=None):
@@ -226,18 +566,62 @@ class ContactsEditor(tk.Toplevel):
     def _add_dialog(self):
         res = self._row_dialog("Add prospect")
         if res["ok"]:
-            self.rows.append(res["data"])
-            self._reload_tree()
+            rid = self._next_id
+            self._next_id += 1
+            self.rows[rid] = res["data"]
+            self.index.add(rid, res["data"])
+            self.order.append(rid)
+            self.view.append(rid)  # shown even if it doesn't match the filter, so you see what you added
+            self.selected = rid
+            self._dirty = True
+            self._update_count()
+            self._show_pos(len(self.view) - 1)
 
     def _edit_dialog(self):
-        idx = self._selected_index()
-        if idx is None: return
-        res = self._row_dialog("Edit prospect", initial=self.rows[idx])
-        if res["ok"]:
-            self.rows[idx] = res["data"]
-            self._reload_tree()
+        rid = self._selected_index()
+        if rid is None: return
+        res = self._row_dialog("Edit prospect", initial=self.rows[rid])
+        if res["ok"] and res["data"] != {k: self.rows[rid].get(k, "") for k in res["data"]}:
+            self.rows[rid].update(res["data"])
+            self.index.update(rid, self.rows[rid])
+            self._dirty = True
+            self._update_count()
+            self._render()
+
 
 
+# ---------- background jobs ----------
+class _Job:
+    """
+    State shared by a worker thread and the Tk thread (see App._start_job).
+    The worker never touches Tk: it reports through progress()/status() and
+    runs dialogs on the Tk thread with ask().
+    """
+    def __init__(self, label, unit):
+        self.label = label
+        self.unit = unit              # for the rate, e.g. "msg" -> "3.2 msg/s"
+        self.events = queue.Queue()
+        self.cancel = threading.Event()
+        self.started = time.monotonic()
+
+    def progress(self, done, total, count=None):
+        """`done` of `total` items handled; `count` (default `done`) is what the rate is measured in."""
+        self.events.put(("progress", done, total, done if count is None else count))
+
+    def status(self, text):
+        self.events.put(("status", text))
+
+    def ask(self, fn, *args):
+        """Run fn(*args) on the Tk thread (e.g. preview_dialog) and return its result; None if cancelled."""
+        reply = queue.Queue(maxsize=1)
+        self.events.put(("ask", fn, args, reply))
+        while not self.cancel.is_set():
+            try:
+                return reply.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
 
 # ---------- GUI ----------
 class App(tk.Tk):
@@ -258,7 +642,19 @@ class App(tk.Tk):
         self._build_email()
 
         self.status_var = tk.StringVar(value="Ready.")
-        ttk.Label(self, textvariable=self.status_var, anchor="w").pack(fill="x", padx=12, pady=(0,8))
+        ttk.Label(self, textvariable=self.status_var, anchor="w").pack(fill="x", padx=12, pady=(0,4))
+
+        # progress for background jobs (sends, cover letter batches)
+        bar = ttk.Frame(self); bar.pack(fill="x", padx=12, pady=(0,8))
+        self.progress = ttk.Progressbar(bar, mode="determinate", maximum=1)
+        self.progress.pack(side="left", fill="x", expand=True)
+        self.progress_var = tk.StringVar(value="")
+        ttk.Label(bar, textvariable=self.progress_var, width=38, anchor="w").pack(side="left", padx=8)
+        self.cancel_btn = ttk.Button(bar, text="Cancel", command=self._cancel_job, state="disabled")
+        self.cancel_btn.pack(side="right")
+        self._job = None
+        self._quit_after_job = False
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
     # ----- COVER LETTER TAB -----
     def _build_cover(self):
@@ -287,7 +683,7 @@ class App(tk.Tk):
 
         # PDF
         self.pdf_var = tk.BooleanVar(value=bool(CFG["defaults"]["pdf"]))
-        ttk.Checkbutton(frm, text="Export PDF (requires Word on macOS)", variable=self.pdf_var).grid(row=4, column=1, sticky="w", pady=4)
+        ttk.Checkbutton(frm, text="Export PDF (Word or LibreOffice)", variable=self.pdf_var).grid(row=4, column=1, sticky="w", pady=4)
 
         # Actions
         btns = ttk.Frame(frm)
@@ -301,6 +697,9 @@ class App(tk.Tk):
         self.batch_csv_var = tk.StringVar()
         ttk.Entry(frm, textvariable=self.batch_csv_var, width=52).grid(row=7, column=1, sticky="we")
         ttk.Button(frm, text="Pick CSV", command=self._pick_batch_csv).grid(row=7, column=2, padx=6)
+        ttk.Label(frm, text="Parallel jobs:").grid(row=8, column=0, sticky="w")
+        self.batch_jobs_var = tk.IntVar(value=min(4, os.cpu_count() or 1))
+        ttk.Spinbox(frm, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.batch_jobs_var, width=5).grid(row=8, column=1, sticky="w")
         ttk.Button(frm, text="Run Batch", command=self._run_batch).grid(row=8, column=2, sticky="e", pady=8)
 
         for c in range(3):
@@ -331,18 +730,10 @@ class App(tk.Tk):
         if not company:
             messagebox.showerror("Error", "Please enter a company.")
             return
-        outdir.mkdir(parents=True, exist_ok=True)
-
-        cmd = [
-            sys.executable, "cover_letter/make_letters.py",
-            "--template", str(tpl),
-            "--company", company,
-            "--position", position,
-            "--outdir", str(outdir),
-        ]
-        if pdf:
-            cmd.append("--pdf")
-        self._run_cmd(cmd, success_msg=f"Cover letter created for {company}")
+        self._run_letters(
+            dict(template=tpl, outdir=outdir, companies=[(company, position)], pdf=pdf),
+            success_msg=f"Cover letter created for {company}",
+        )
 
     def _run_batch(self):
         tpl = Path(self.cover_tpl_var.get()).expanduser()
@@ -354,17 +745,11 @@ class App(tk.Tk):
             messagebox.showerror("Error", f"Template not found:\n{tpl}"); return
         if not csv_path.is_file():
             messagebox.showerror("Error", f"CSV not found:\n{csv_path}"); return
-        outdir.mkdir(parents=True, exist_ok=True)
-
-        cmd = [
-            sys.executable, "cover_letter/make_letters.py",
-            "--template", str(tpl),
-            "--csv", str(csv_path),
-            "--outdir", str(outdir),
-        ]
-        if pdf:
-            cmd.append("--pdf")
-        self._run_cmd(cmd, success_msg=f"Batch generated from {csv_path.name}")
+        self._run_letters(
+            dict(template=tpl, outdir=outdir, csv_path=csv_path, pdf=pdf,
+                 jobs=max(1, int(self.batch_jobs_var.get() or 1))),
+            success_msg=f"Batch generated from {csv_path.name}",
+        )
 
     # ----- EMAIL TAB -----
     def _build_email(self):
@@ -411,7 +796,9 @@ class App(tk.Tk):
 
     def _open_email_log(self):
         log = Path(CFG["paths"]["email_log"])
-        if not log.exists():
+        try:
+            log = mailer.viewable_sent_log(log)  # CSV snapshot if it's the SQLite ledger
+        except FileNotFoundError:
             messagebox.showinfo("Info", f"Log not found yet:\n{log}")
             return
         open_in_finder(log)
@@ -457,68 +844,167 @@ class App(tk.Tk):
             messagebox.showerror("Not found", f"Contacts CSV not found:\n{contacts_csv}")
             return
 
-        # Load dedupe set once
+        # Check every template against the CSV before anything is sent
         try:
-            sent_keys = mailer.load_sent_log_from_path(sent_log_path)
+            errors, unknown = mailer.preflight(contacts_csv, tpl_path)
         except Exception as e:
-            messagebox.showerror("Log error", f"Could not read log:\n{sent_log_path}\n\n{e}")
+            messagebox.showerror("CSV error", f"Could not read contacts:\n{contacts_csv}\n\n{e}")
             return
+        if errors:
+            messagebox.showerror("Template / CSV mismatch", "\n\n".join(errors))
+            return
+        if unknown:
+            listing = "\n".join(f"  {k}  ({n} rows)" for k, n in sorted(unknown.items()))
+            if not messagebox.askyesno(
+                "Unknown templates",
+                f"No template file found in {tpl_path.parent} for:\n\n{listing}\n\n"
+                f"Send those rows with {tpl_path.name} instead?"
+            ):
+                return
 
-        seen = set()
-        n_sent = n_already = n_preview_skipped = 0
-
-        try:
-            with contacts_csv.open(newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    msg = mailer.compose_email_from_row(row, tpl_path, cc_everyone)
-
-                    # dedupe
-                    if msg["key"] in sent_keys or msg["key"] in seen:
-                        n_already += 1
-                        continue
-                    seen.add(msg["key"])
-
-                    # GUI preview loop
-                    if preview_mode:
-                        action = preview_dialog(self, msg)   # self is the Tk root
-                        if action == "cancel":
-                            break
-                        if action == "skip":
-                            n_preview_skipped += 1
-                            continue  # skip this row; continue to next
-
-                    # Send + log
-                    mailer.send_mail(
-                        recipient=msg["to"],
-                        subject=msg["subject"],
-                        body=msg["body"],
-                        cced=msg["cc_flag"],
-                    )
-                    mailer.append_to_log_path(sent_log_path, msg["key"], msg["cc_flag"])
-                    n_sent += 1
+        def work(job):
+            total = sum(1 for _ in mailer.load_prospects_from_path(contacts_csv))
+            counts = {"done": 0, "sent": 0}
+            lock = threading.Lock()
+
+            def tick(sent=False):
+                with lock:
+                    counts["done"] += 1
+                    counts["sent"] += sent
+                    job.progress(counts["done"], total, counts["sent"])
+
+            def confirm(msg):
+                action = job.ask(preview_dialog, self, msg)
+                if action == "cancel":
+                    job.cancel.set()
+                if action != "send":
+                    tick()
+                return action == "send"
+
+            job.progress(0, total, 0)
+            # Same pipeline as the CLI: rows stream through read -> dedupe ->
+            # compose, one authenticated connection sends them all
+            return mailer.send_batch(
+                contacts_csv, tpl_path, sent_log_path, cc_everyone, row_template=True,
+                workers=1, rate=0, jitter=0, check=False, progress=job.status,
+                confirm=confirm if preview_mode else None, cancel=job.cancel,
+                on_skip=lambda key: tick(), on_sent=lambda m: tick(True), on_failed=lambda m, e: tick(),
+            )
 
+        def done(res):
             self.status_var.set(
-                f"Emails sent: {n_sent} | already logged: {n_already} | skipped in preview: {n_preview_skipped}"
+                (f"Cancelled ({res['dropped']} not sent). " if res["cancelled"] else "")
+                + f"Emails sent: {res['sent']} | already logged: {res['already']} | skipped in preview: {res['declined']}"
+                + (f" | failed: {len(res['failed'])}" if res["failed"] else "")
             )
-        except Exception as e:
-            messagebox.showerror("Error", f"{e}\n\n{traceback.format_exc()}")
-            self.status_var.set("Error.")
+            if res["failed"]:
+                listing = "\n".join(f"{key}: {err}" for key, err in res["failed"][:20])
+                messagebox.showerror("Some emails failed", f"{len(res['failed'])} failed:\n\n{listing}")
 
+        self._start_job("Sending", "msg", work, done)
 
-    # ----- shared runner -----
-    def _run_cmd(self, cmd, success_msg="Done"):
-        try:
-            self.status_var.set("Running…")
-            self.update_idletasks()
-            subprocess.run(cmd, check=True)
-            self.status_var.set(success_msg)
-        except subprocess.CalledProcessError as e:
-            self.status_var.set("Error.")
-            messagebox.showerror("Command failed", f"{' '.join(cmd)}\n\nExit code: {e.returncode}")
-        except Exception as e:
+
+    # ----- cover letter runner -----
+    def _run_letters(self, kwargs, success_msg="Done"):
+        """make_letters.generate_letters on a worker thread (the parsed template stays cached between clicks)."""
+        def work(job):
+            return make_letters.generate_letters(
+                progress=job.status, on_progress=job.progress, cancel=job.cancel, **kwargs
+            )
+
+        def done(res):
+            if res["failed"]:
+                self.status_var.set(f"{len(res['failed'])} letter(s) failed.")
+                messagebox.showerror("Some letters failed", make_letters.summarize_letters(res))
+            else:
+                self.status_var.set(("Cancelled. " if res["cancelled"] else f"{success_msg} ")
+                                    + f"({res['generated']} generated, {res['skipped']} up to date)")
+
+        self._start_job("Generating", "letters", work, done)
+
+    # ----- background jobs -----
+    def _start_job(self, label, unit, work, on_done):
+        """
+        Run work(job) on a worker thread so the window stays responsive;
+        on_done(result) runs back on the Tk thread. One job at a time.
+        """
+        if self._job is not None:
+            messagebox.showinfo("Busy", f"{self._job.label} is still running. Wait for it or press Cancel.")
+            return
+        job = self._job = _Job(label, unit)
+        job.on_done = on_done
+
+        def run():
+            try:
+                job.events.put(("done", work(job)))
+            except Exception as e:
+                job.events.put(("error", e, traceback.format_exc()))
+
+        self.status_var.set(f"{label}…")
+        self.progress.configure(value=0, maximum=1)
+        self.progress_var.set("")
+        self.cancel_btn.configure(state="normal")
+        threading.Thread(target=run, name=f"gui-{label.lower()}", daemon=True).start()
+        self.after(100, self._poll_job)
+
+    def _poll_job(self):
+        job = self._job
+        if job is None:
+            return
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            kind = event[0]
+            if kind == "progress":
+                self._show_progress(job, *event[1:])
+            elif kind == "status":
+                self.status_var.set(event[1])
+            elif kind == "ask":
+                _, fn, args, reply = event
+                reply.put(fn(*args))  # modal; the worker waits for the answer
+            else:
+                self._finish_job(job, event)
+                return
+        self.after(100, self._poll_job)
+
+    def _show_progress(self, job, done, total, count):
+        self.progress.configure(maximum=max(total, 1), value=done)
+        elapsed = time.monotonic() - job.started
+        rate = count / elapsed if elapsed > 0 else 0.0
+        text = f"{done}/{total}"
+        if rate > 0:
+            text += f"  {rate:.1f} {job.unit}/s"
+            if total > done:
+                eta = int((total - done) / rate)
+                text += f"  ETA {eta // 60}:{eta % 60:02d}"
+        self.progress_var.set(text)
+
+    def _finish_job(self, job, event):
+        self._job = None
+        self.cancel_btn.configure(state="disabled", text="Cancel")
+        if event[0] == "done":
+            job.on_done(event[1])
+        else:
+            _, e, tb = event
             self.status_var.set("Error.")
-            messagebox.showerror("Error", f"{e}\n\n{traceback.format_exc()}")
+            messagebox.showerror("Error", f"{e}\n\n{tb}")
+        if self._quit_after_job:
+            self.destroy()
+
+    def _cancel_job(self):
+        if self._job is not None:
+            self._job.cancel.set()
+            self.cancel_btn.configure(state="disabled", text="Cancelling…")
+            self.status_var.set("Cancelling after the current item…")
+
+    def _on_close(self):
+        if self._job is None:
+            self.destroy()
+        elif messagebox.askyesno("Job running", f"{self._job.label} is still running. Stop it and quit?"):
+            self._quit_after_job = True
+            self._cancel_job()
 
     # Open contacts CSV for editing
     def _edit_prospects(self):
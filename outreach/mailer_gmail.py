@@ -4,9 +4,14 @@ import ssl
 import random
 import time
 import os
+import queue
+import re
+import string
+import threading
 from pathlib import Path
 from datetime import datetime, timezone
 from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 from dotenv import load_dotenv
 
 # parser = argparse.ArgumentParser()
@@ -65,13 +70,398 @@ def load_sent_log_from_path(path: Path):
         return keys
 
 def append_to_log_path(path: Path, key: str, cced: bool):
+    # same columns as append_to_log() so both writers agree
     import csv
     existed = path.exists()
     with path.open("a", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         if not existed:
-            w.writerow(["key", "cced"])
-        w.writerow([key, "yes" if cced else "no"])
+            w.writerow(["key", "cced", "timestamp"])
+        w.writerow([key, bool(cced), datetime.now(timezone.utc).isoformat()])
+
+
+class CsvLogWriter:
+    """
+    Long-lived, thread-safe appender for sent_log.csv. Keeps the file open
+    and group-commits: rows are flushed + fsynced every `flush_rows` rows or
+    `flush_ms` milliseconds (whichever comes first), and on close(). close()
+    is also registered with atexit so a normal exit or Ctrl-C never loses
+    rows; see flush_on_sigterm() for SIGTERM.
+    """
+    def __init__(self, path: Path, flush_rows: int = 20, flush_ms: int = 500):
+        import atexit
+        self.path = Path(path)
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_ms = max(1, int(flush_ms))
+        self._lock = threading.Lock()
+        new = not self.path.exists() or self.path.stat().st_size == 0
+        self._f = self.path.open("a", newline="", encoding="utf-8")
+        self._w = csv.writer(self._f)
+        if new:
+            self._w.writerow(["key", "cced", "timestamp"])
+        self._dirty = 0
+        self._stop = threading.Event()
+        self._timer = threading.Thread(target=self._flush_loop, name="log-flush", daemon=True)
+        self._timer.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def write(self, key: str, cced: bool):
+        with self._lock:
+            if self._f is None:
+                raise ValueError(f"log writer for {self.path} is closed")
+            self._w.writerow([key, bool(cced), datetime.now(timezone.utc).isoformat()])
+            self._dirty += 1
+            if self._dirty >= self.flush_rows:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._f is None or not self._dirty:
+            return
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._dirty = 0
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_ms / 1000):
+            self.flush()
+
+    def close(self):
+        import atexit
+        self._stop.set()
+        with self._lock:
+            if self._f is None:
+                return
+            self._flush_locked()
+            self._f.close()
+            self._f = None
+        atexit.unregister(self.close)
+
+
+def flush_on_sigterm():
+    """Turn SIGTERM into SystemExit so `with` blocks and atexit flush the logs."""
+    import signal
+    import sys
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+
+class CsvSentLog:
+    """sent_log.csv behind the same interface as SentLedger."""
+    def __init__(self, path: Path, flush_rows: int = 20, flush_ms: int = 500):
+        self.path = Path(path)
+        self._keys = load_sent_log_from_path(self.path)
+        self._writer = CsvLogWriter(self.path, flush_rows=flush_rows, flush_ms=flush_ms)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def record(self, key: str, cced: bool, template=None, message_id=None, status="sent"):
+        if status != "sent":
+            return  # the CSV only ever listed successful sends
+        self._writer.write(key, cced)
+        self._keys.add(key)
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        self._writer.close()
+
+
+_LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sent (
+    id         INTEGER PRIMARY KEY,
+    key        TEXT NOT NULL,
+    cced       INTEGER NOT NULL DEFAULT 0,
+    timestamp  TEXT NOT NULL,
+    template   TEXT,
+    message_id TEXT,
+    status     TEXT NOT NULL DEFAULT 'sent'
+);
+CREATE INDEX IF NOT EXISTS sent_key_status ON sent (key, status);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+class SentLedger:
+    """
+    SQLite sent ledger (WAL mode): one row per send attempt with key, cc flag,
+    timestamp, template, Message-ID and status. `key in ledger` is an indexed
+    lookup, so startup cost no longer grows with history. record() buffers
+    rows and writes them `batch_size` at a time in one transaction; close()
+    (or leaving the `with` block) writes whatever is left.
+
+    On first open, a sent_log.csv next to the database is imported once.
+    """
+    def __init__(self, path: Path, batch_size: int = 20):
+        import sqlite3
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, int(batch_size))
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_keys = set()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_LEDGER_SCHEMA)
+        legacy = self.path.with_suffix(".csv")
+        if legacy.is_file() and self._meta("imported_csv") is None:
+            self.import_csv(legacy)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _meta(self, name):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def import_csv(self, csv_path: Path) -> int:
+        """One-shot import of a sent_log.csv (key,cced[,timestamp]). Returns rows imported."""
+        csv_path = Path(csv_path)
+        rows = []
+        with csv_path.open(newline="", encoding="utf-8") as f:
+            r = csv.reader(f)
+            next(r, None)  # header
+            for row in r:
+                if not row:
+                    continue
+                ts = row[2] if len(row) > 2 and row[2] else datetime.now(timezone.utc).isoformat()
+                cced = is_truthy(row[1]) if len(row) > 1 else False
+                rows.append((row[0], int(cced), ts, None, None, "sent"))
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO sent (key, cced, timestamp, template, message_id, status) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('imported_csv', ?)", (str(csv_path),)
+            )
+        return len(rows)
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._pending_keys:
+                return True
+            return self._db.execute(
+                "SELECT 1 FROM sent WHERE key = ? AND status = 'sent' LIMIT 1", (key,)
+            ).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            (n,) = self._db.execute("SELECT COUNT(DISTINCT key) FROM sent WHERE status = 'sent'").fetchone()
+            return n + len(self._pending_keys)
+
+    def record(self, key: str, cced: bool, template=None, message_id=None, status="sent"):
+        with self._lock:
+            self._pending.append(
+                (key, int(bool(cced)), datetime.now(timezone.utc).isoformat(), template, message_id, status)
+            )
+            if status == "sent":
+                self._pending_keys.add(key)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO sent (key, cced, timestamp, template, message_id, status) VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending = []
+        self._pending_keys = set()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def export_csv(self, csv_path: Path) -> Path:
+        """Write the ledger out as CSV (for opening in a spreadsheet)."""
+        self.flush()
+        csv_path = Path(csv_path)
+        with self._lock, csv_path.open("w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["key", "cced", "timestamp", "template", "message_id", "status"])
+            for key, cced, ts, tpl, mid, status in self._db.execute(
+                "SELECT key, cced, timestamp, template, message_id, status FROM sent ORDER BY id"
+            ):
+                w.writerow([key, bool(cced), ts, tpl or "", mid or "", status])
+        return csv_path
+
+
+def open_sent_log(path: Path):
+    """SentLedger for .db/.sqlite paths, CsvSentLog for .csv (legacy)."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        return CsvSentLog(path)
+    return SentLedger(path)
+
+def viewable_sent_log(path: Path) -> Path:
+    """
+    A CSV of the sent log to open in a viewer: a .csv log as is, a snapshot of
+    the ledger, or (no sends since switching to the ledger) the legacy CSV it
+    will import. FileNotFoundError if there is no log yet.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv" or not path.exists():
+        legacy = path if path.suffix.lower() == ".csv" else path.with_suffix(".csv")
+        if not legacy.is_file():
+            raise FileNotFoundError(path)
+        return legacy
+    with SentLedger(path) as ledger:
+        return ledger.export_csv(path.with_suffix(".export.csv"))
+
+
+class CompiledTemplate:
+    """
+    A str.format-style template parsed once with string.Formatter().parse:
+    `parts` is the list of (literal, field, format_spec, conversion) chunks and
+    `fields` the set of top-level placeholder names. render(row) gives the
+    same result as text.format(**row).
+    """
+    def __init__(self, path: Path, text: str):
+        self.path = path
+        self.text = text
+        self.parts = list(string.Formatter().parse(text))
+        self.fields = {
+            f.split(".")[0].split("[")[0] for _, f, _, _ in self.parts if f is not None
+        }
+        # plain {name} fields only -> render by lookup; anything fancier
+        # ({0}, {a.b}, {x!r}, {y:>10}) goes through str.format
+        self._simple = all(
+            f is None or (f.isidentifier() and not spec and conv is None)
+            for _, f, spec, conv in self.parts
+        )
+
+    def render(self, row: dict) -> str:
+        if not self._simple:
+            return self.text.format(**row)
+        out = []
+        for lit, f, _, _ in self.parts:
+            out.append(lit)
+            if f is not None:
+                out.append(format(row[f], ""))
+        return "".join(out)
+
+
+_TEMPLATE_CACHE = {}  # path -> ((mtime_ns, size), CompiledTemplate)
+_TEMPLATE_LOCK = threading.Lock()
+
+def get_compiled_template(path: Path) -> CompiledTemplate:
+    """
+    Cached CompiledTemplate for `path`. Costs one stat() per call; the file is
+    only re-read and re-parsed when its mtime or size changes, so edits made
+    mid-session are picked up on the next row.
+    """
+    path = Path(path)
+    st = path.stat()
+    sig = (st.st_mtime_ns, st.st_size)
+    with _TEMPLATE_LOCK:
+        hit = _TEMPLATE_CACHE.get(path)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+    tpl = CompiledTemplate(path, load_template_from_path(path))
+    with _TEMPLATE_LOCK:
+        _TEMPLATE_CACHE[path] = (sig, tpl)
+    return tpl
+
+
+TEMPLATE_EXTS = (".tpl.txt", ".txt", ".md")  # lookup precedence for a template key
+
+class TemplateRegistry:
+    """
+    In-memory index of a template folder: key -> path (e.g. 'edwin' ->
+    edwin.tpl.txt), with the same extension precedence as TEMPLATE_EXTS.
+    The folder is scanned once and re-scanned only when its mtime changes
+    (files added, removed or renamed); the mtime is checked at most every
+    `ttl` seconds, so per-row lookups never touch the filesystem.
+    """
+    def __init__(self, tpl_dir: Path, ttl: float = 2.0):
+        self.dir = Path(tpl_dir)
+        self.ttl = ttl
+        self._index = {}
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked < self.ttl:
+                return
+            self._checked = now
+            try:
+                mtime = self.dir.stat().st_mtime_ns
+            except OSError:
+                self._index, self._mtime = {}, None
+                return
+            if not force and mtime == self._mtime:
+                return
+            best = {}  # key -> (precedence, path)
+            with os.scandir(self.dir) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    for rank, ext in enumerate(TEMPLATE_EXTS):
+                        if entry.name.endswith(ext):
+                            key = entry.name[: -len(ext)]
+                            if key not in best or rank < best[key][0]:
+                                best[key] = (rank, Path(entry.path))
+            self._index = {k: path for k, (_, path) in best.items()}
+            self._mtime = mtime
+
+    def get(self, key: str):
+        self.refresh()
+        return self._index.get(key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def keys(self):
+        self.refresh()
+        return set(self._index)
+
+
+_REGISTRIES = {}  # GUI/CLI template path -> TemplateRegistry of its folder
+
+def template_registry(tpl_path: Path) -> TemplateRegistry:
+    """Registry for the folder of tpl_path (or tpl_path itself if it is a folder)."""
+    p = Path(tpl_path)
+    reg = _REGISTRIES.get(p)
+    if reg is None:
+        reg = _REGISTRIES[p] = TemplateRegistry(p if p.is_dir() else p.parent)
+    return reg
 
 
 # Fallback to prospects.csv first before going to the template 
@@ -83,14 +473,65 @@ def resolve_template_path_for_row(row: dict, gui_tpl_path: Path) -> Path:
     p = Path(gui_tpl_path)
     row_key = (row.get("template") or "").strip()
     if row_key:
-        tpl_dir = p if p.is_dir() else p.parent
-        for ext in (".tpl.txt", ".txt", ".md"):
-            cand = tpl_dir / f"{row_key}{ext}"
-            if cand.is_file():
-                return cand
+        cand = template_registry(p).get(row_key)
+        if cand is not None:
+            return cand
     # fallback
     return p
 
+
+REQUIRED_COLUMNS = ("first_name", "last_name", "company_domain")  # used for To: and the dedupe key
+
+def preflight(contacts_path: Path, tpl_path: Path, row_template: bool = True):
+    """
+    Check the CSV rows and every template they will use, before anything is sent.
+    Returns (errors, unknown): problem descriptions, and {template_key: rows} for
+    keys with no file (they fall back to tpl_path).
+    """
+    contacts_path, tpl_path = Path(contacts_path), Path(tpl_path)
+    reg = template_registry(tpl_path) if row_template else None
+    uses = {} if row_template else {tpl_path: 0}  # template path -> rows using it
+    unknown = {}
+    incomplete = []  # (line, missing columns)
+    with contacts_path.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        columns = set(reader.fieldnames or [])
+        errors = [f"CSV is missing required column '{c}'." for c in REQUIRED_COLUMNS if c not in columns]
+        required = [c for c in REQUIRED_COLUMNS if c in columns]
+        for row in reader:
+            missing = [c for c in required if not (row.get(c) or "").strip()]
+            if missing:
+                incomplete.append((reader.line_num, missing))
+            if row_template:
+                key = (row.get("template") or "").strip()
+                chosen = reg.get(key) if key else None
+                if key and chosen is None:
+                    unknown[key] = unknown.get(key, 0) + 1
+                chosen = chosen or tpl_path
+                uses[chosen] = uses.get(chosen, 0) + 1
+
+    for line, missing in incomplete[:20]:
+        errors.append(f"CSV line {line} has no {', '.join(missing)}.")
+    if len(incomplete) > 20:
+        errors.append(f"... and {len(incomplete) - 20} more rows with missing values.")
+
+    for path, n in sorted(uses.items()):
+        rows = f" (used by {n} rows)" if n else ""
+        try:
+            tpl = get_compiled_template(path)
+        except OSError as e:
+            errors.append(f"Template '{path}'{rows} can't be read: {e}")
+            continue
+        except ValueError as e:
+            errors.append(f"Template '{path.name}'{rows} is malformed: {e}")
+            continue
+        for field in sorted(tpl.fields - columns):
+            errors.append(
+                f"Template '{path.name}'{rows} uses placeholder '{{{field}}}' but the CSV has no "
+                f"'{field}' column. Add the column or remove it from the template."
+            )
+    return errors, unknown
+
 # --------- End of adding feature 
 
 load_dotenv()
@@ -117,8 +558,8 @@ def append_to_log(key, cced):
         writer.writerow([key, cced, datetime.now(timezone.utc).isoformat()])
 
 def load_prospects():
-    with open(CSV, newline="") as f:
-        return list(csv.DictReader(f))
+    # stream rows; don't hold the whole CSV in memory
+    yield from load_prospects_from_path(Path(CSV))
 
 # New logic 
 def is_truthy(val) -> bool:
@@ -170,7 +611,129 @@ def build_subject(row: dict) -> str:
 
 
 
-def send_mail(recipient, subject, body, cced=False):
+# overridable so the benchmark (bench/bench_mailer.py) can point us at a local sink
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_CAFILE = os.getenv("SMTP_CAFILE")  # extra CA bundle to trust, e.g. a self-signed test cert
+
+
+class DeliveryUnknown(ConnectionError):
+    """The connection dropped after DATA was sent: the server may or may not have accepted the message."""
+
+
+class SMTPConnectFailed(ConnectionError):
+    """Couldn't connect or log in. Fatal for a batch: every later message would just fail the same way."""
+
+
+_SMTP_SSL = None
+
+def _smtp_ssl_class():
+    """smtplib.SMTP_SSL that notes when DATA went out (built on first use, like the smtplib import)."""
+    global _SMTP_SSL
+    if _SMTP_SSL is None:
+        import smtplib
+
+        class _SMTP_SSL_(smtplib.SMTP_SSL):
+            data_sent = False
+
+            def data(self, msg):
+                self.data_sent = True
+                return super().data(msg)
+
+        _SMTP_SSL = _SMTP_SSL_
+    return _SMTP_SSL
+
+
+class SMTPSession:
+    """
+    One authenticated SMTP_SSL connection reused for a whole batch.
+
+    Connects lazily on the first send, NOOPs the server if the connection has
+    been idle longer than `keepalive` seconds, and reconnects once if the
+    server dropped us before the message was handed over; a drop after DATA
+    raises DeliveryUnknown instead, since the server may already have it.
+    Use as a context manager so the connection is closed (QUIT) when the
+    batch ends.
+    """
+    def __init__(self, user=None, password=None, host=SMTP_HOST, port=SMTP_PORT, keepalive=60.0):
+        self.user = user or USER
+        self.password = password or PASS
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.logins = 0
+        self.sent = 0
+        self._smtp = None
+        self._last_used = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def connect(self):
+        self.close()
+        ctx = ssl.create_default_context(cafile=SMTP_CAFILE)
+        try:
+            s = _smtp_ssl_class()(self.host, self.port, context=ctx)
+        except OSError as e:
+            raise SMTPConnectFailed(f"can't connect to {self.host}:{self.port}: {e}") from e
+        try:
+            s.login(self.user, self.password)
+        except Exception as e:
+            s.close()
+            raise SMTPConnectFailed(f"login as {self.user} failed: {e}") from e
+        self._smtp = s
+        self._last_used = time.monotonic()
+        self.logins += 1
+
+    def close(self):
+        s, self._smtp = self._smtp, None
+        if s is None:
+            return
+        try:
+            s.quit()
+        except Exception:
+            s.close()
+
+    def _ensure_alive(self):
+        if self._smtp is None:
+            self.connect()
+            return
+        if time.monotonic() - self._last_used < self.keepalive:
+            return
+        try:
+            code, _ = self._smtp.noop()
+        except Exception:
+            code = None
+        if code != 250:
+            self.connect()
+
+    def send(self, msg: EmailMessage):
+        import smtplib
+        self._ensure_alive()
+        self._smtp.data_sent = False
+        try:
+            self._smtp.send_message(msg)
+        except smtplib.SMTPResponseException:
+            raise  # the server answered, so it didn't take the message
+        except OSError as e:
+            if self._smtp is not None and self._smtp.data_sent:
+                self.close()
+                raise DeliveryUnknown(f"connection lost after the message was handed over; it may have been "
+                                      f"delivered, check your Sent folder before retrying ({e})") from e
+            if not isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError)):
+                raise
+            # dropped between NOOP and DATA: reconnect once and retry
+            self.connect()
+            self._smtp.send_message(msg)
+        self._last_used = time.monotonic()
+        self.sent += 1
+
+
+def build_message(recipient, subject, body, cced=False) -> EmailMessage:
     msg = EmailMessage()
     msg["From"] = f"{NAME} <{USER}>"
     msg["To"]      = recipient
@@ -179,25 +742,224 @@ def send_mail(recipient, subject, body, cced=False):
     if cced:
         msg["Cc"] = "el52@rice.edu"
 
-    
+    msg["Message-ID"] = make_msgid(domain=(USER or "localhost").rpartition("@")[2] or None)
     msg.set_content(body)
-    ctx = ssl.create_default_context()
-    with __import__("smtplib").SMTP_SSL("smtp.gmail.com", 465, context=ctx) as s:
-        s.login(USER, PASS)
-        s.send_message(msg)
+    return msg
+
+
+def send_mail(recipient, subject, body, cced=False, session=None) -> str:
+    """Send one email and return its Message-ID. Pass an open SMTPSession to reuse its connection."""
+    msg = build_message(recipient, subject, body, cced=cced)
+    if session is not None:
+        session.send(msg)
+    else:
+        with SMTPSession() as s:
+            s.send(msg)
+    return msg["Message-ID"]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` messages/sec on average, up to `burst`
+    back to back, plus up to `jitter` seconds of random delay per message so
+    the sends don't look machine-timed. rate <= 0 means unlimited.
+    """
+    def __init__(self, rate: float, burst: int = 1, jitter: float = 0.0):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.jitter = max(0.0, float(jitter))
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if one is available; else return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
 
+    def acquire(self):
+        if self.rate > 0:
+            while True:
+                wait = self._take()
+                if not wait:
+                    break
+                time.sleep(wait)
+        if self.jitter:
+            time.sleep(random.uniform(0, self.jitter))
 
-def compose_email_from_row(row: dict, tpl_path: Path, cc_default: bool) -> dict:
+    async def acquire_async(self):
+        import asyncio
+        if self.rate > 0:
+            while True:
+                wait = self._take()
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        if self.jitter:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+
+
+class SendEngine:
+    """
+    Sends composed messages from `workers` threads (one SMTPSession each) behind
+    one TokenBucket. Failures, including a raising hook, land in `failed` as
+    (msg, exc); a failed login stops every worker and sets `error`.
+    """
+    def __init__(self, workers=1, rate=0.5, burst=1, jitter=0.0, on_sent=None, session_factory=SMTPSession,
+                 on_start=None, on_failed=None, progress=None):
+        self.workers = max(1, int(workers))
+        self.limiter = TokenBucket(rate, burst, jitter)
+        self.on_sent = on_sent
+        self.on_start = on_start
+        self.on_failed = on_failed
+        self.progress = progress
+        self.session_factory = session_factory
+        self.sent = 0
+        self.failed = []
+        self._q = queue.Queue(maxsize=self.workers * 4)
+        self._lock = threading.Lock()
+        self._threads = []
+        self.error = None  # what stopped a worker thread, if anything did
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"sender-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, msg: dict):
+        if not self._put(msg):
+            raise RuntimeError(f"Sending stopped: {self.error}" if self.error else "SendEngine not started.")
+
+    def _put(self, item) -> bool:
+        """Queue `item`, waiting for room while any worker is alive; False if none is."""
+        while any(t.is_alive() for t in self._threads):
+            try:
+                self._q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def discard_pending(self) -> int:
+        """Drop queued messages no worker has picked up yet (on cancel); returns how many."""
+        dropped = 0
+        while True:
+            try:
+                msg = self._q.get_nowait()
+            except queue.Empty:
+                return dropped
+            if msg is None:  # a stop sentinel from close(): put it back
+                self._q.put(None)
+                return dropped
+            dropped += 1
+
+    def close(self):
+        """Drain the queue and stop the workers."""
+        for _ in self._threads:
+            if not self._put(None):
+                break
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        # workers that died leave their share of the queue behind
+        while True:
+            try:
+                msg = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if msg is not None:
+                self.failed.append((msg, RuntimeError(f"not sent: sender stopped ({self.error})")))
+
+    def _report(self, line):
+        if self.progress is not None:
+            self.progress(line)
+
+    def _hook(self, name, msg, *args) -> bool:
+        """Call the `name` hook under the lock; if it raises, record the message as failed. False if it did."""
+        hook = getattr(self, name)
+        if hook is None:
+            return True
+        try:
+            with self._lock:
+                hook(msg, *args)
+            return True
+        except Exception as e:
+            # e.g. "database is locked" from the sent log: keep going, but don't lose it
+            with self._lock:
+                self.failed.append((msg, e))
+            self._report(f"{name} failed for {msg['to']}: {e}")
+            return False
+
+    def _worker(self):
+        try:
+            with self.session_factory() as smtp:
+                while True:
+                    msg = self._q.get()
+                    if msg is None:
+                        return
+                    if self.error is not None:  # another worker can't log in either
+                        with self._lock:
+                            self.failed.append((msg, RuntimeError(f"not sent: {self.error}")))
+                        return
+                    self.limiter.acquire()
+                    if not self._hook("on_start", msg):
+                        continue
+                    try:
+                        if "eml" in msg:  # prebuilt message, e.g. from an outbox
+                            smtp.send(msg["eml"])
+                            msg["message_id"] = msg["eml"]["Message-ID"]
+                        else:
+                            msg["message_id"] = send_mail(msg["to"], msg["subject"], msg["body"], cced=msg["cc_flag"], session=smtp)
+                    except Exception as e:
+                        with self._lock:
+                            self.failed.append((msg, e))
+                        self._report(f"Failed to send to {msg['to']}: {e}")
+                        self._hook("on_failed", msg, e)
+                        if isinstance(e, SMTPConnectFailed):
+                            # a wrong app password fails every message; stop instead of logging in per row
+                            self.error = e
+                            self._report(f"Stopping: {e}")
+                            return
+                        continue
+                    with self._lock:
+                        self.sent += 1
+                    self._hook("on_sent", msg)
+        except Exception as e:
+            self.error = e
+            self._report(f"Sender thread stopped: {e}")
+
+
+def prospect_key(row: dict) -> str:
+    """Dedupe key for a prospect: first::last::domain, lowercased."""
+    return f"{row['first_name'].lower()}::{row['last_name'].lower()}::{row['company_domain'].lower()}"
+
+
+def compose_email_from_row(row: dict, tpl_path: Path, cc_default: bool, row_template: bool = True) -> dict:
     to_addr = f"{row['first_name'].lower()}.{row['last_name'].lower()}@{row['company_domain']}"
     cc_flag = is_truthy(row.get("cced")) if "cced" in row else cc_default
     subj = build_subject(row)
 
-    # NEW: pick per-row template if available
-    chosen_tpl = resolve_template_path_for_row(row, tpl_path)
-    tpl_text = load_template_from_path(chosen_tpl)
+    # NEW: pick per-row template if available (row_template=False: tpl_path always wins)
+    chosen_tpl = resolve_template_path_for_row(row, tpl_path) if row_template else Path(tpl_path)
+    tpl = get_compiled_template(chosen_tpl)
 
     try:
-        body = tpl_text.format(**row)
+        body = tpl.render(row)
     except KeyError as e:
         missing = str(e).strip("'")
         raise KeyError(
@@ -205,7 +967,7 @@ def compose_email_from_row(row: dict, tpl_path: Path, cc_default: bool) -> dict:
             f"Add column '{missing}' or remove it from the template."
         ) from e
 
-    key = f"{row['first_name'].lower()}::{row['last_name'].lower()}::{row['company_domain'].lower()}"
+    key = prospect_key(row)
     return {
         "key": key,
         "to": to_addr,
@@ -213,85 +975,646 @@ def compose_email_from_row(row: dict, tpl_path: Path, cc_default: bool) -> dict:
         "subject": subj,
         "body": body,
         "cc_flag": cc_flag,
+        "template": chosen_tpl.name,
     }
 
 
+# --------- Streaming pipeline: read -> key -> dedupe -> compose -> (send -> log)
+class StageMeter:
+    """
+    Per-stage item counts and timings for a chain of generators. wrap() each
+    stage in order; time is measured around next(), so a stage's own cost is
+    its time minus the stage before it.
+    """
+    def __init__(self):
+        self.stages = []  # [name, count, inclusive seconds, exclusive?]
 
-if __name__ == "__main__":
+    def wrap(self, name, items):
+        rec = [name, 0, 0.0, False]
+        self.stages.append(rec)
+        return self._metered(rec, iter(items))
+
+    @staticmethod
+    def _metered(rec, it):
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                rec[2] += time.perf_counter() - t0
+                return
+            rec[2] += time.perf_counter() - t0
+            rec[1] += 1
+            yield item
+
+    def add(self, name, count, seconds):
+        """Record a stage that isn't a wrapped generator (e.g. the send engine)."""
+        self.stages.append([name, count, seconds, True])
+
+    def report(self) -> str:
+        lines, prev = [], 0.0
+        for name, count, secs, exclusive in self.stages:
+            own = secs if exclusive else max(secs - prev, 0.0)
+            if not exclusive:
+                prev = secs
+            rate = count / own if own > 0 else float("inf")
+            lines.append(f"  {name:<8} {count:>9,} items  {own:8.2f}s  {rate:>12,.0f}/s")
+        return "\n".join(lines)
+
+
+def stage_keys(rows):
+    for row in rows:
+        yield prospect_key(row), row
+
+def stage_dedupe(items, sent_log, on_skip=None):
+    # `seen` (keys of this run) is the only state that grows with the input
+    seen = set()
+    for key, row in items:
+        if key in seen or key in sent_log:
+            if on_skip is not None:
+                on_skip(key)
+            continue
+        seen.add(key)
+        yield key, row
+
+def stage_compose(items, tpl_path, cc_default, row_template=True):
+    for _, row in items:
+        yield compose_email_from_row(row, tpl_path, cc_default, row_template=row_template)
+
+
+def stream_messages(contacts_path: Path, tpl_path: Path, sent_log, cc_default=False,
+                    row_template=True, meter=None, on_skip=None):
+    """
+    Lazily read -> key -> dedupe -> compose the contacts CSV, one row at a
+    time. Feed the result to a SendEngine (or the async queue), whose bounded
+    queue provides backpressure, so memory stays flat on any size of CSV.
+    Pass a StageMeter to get per-stage throughput.
+    """
+    meter = meter or StageMeter()
+    rows = meter.wrap("read", load_prospects_from_path(Path(contacts_path)))
+    items = meter.wrap("key", stage_keys(rows))
+    items = meter.wrap("dedupe", stage_dedupe(items, sent_log, on_skip))
+    return meter.wrap("compose", stage_compose(items, tpl_path, cc_default, row_template))
+
+
+# --------- Outbox: render the whole batch to .eml files / an mbox, send it later
+OUTBOX_KEY_HEADER = "X-Outreach-Key"            # stripped again before sending
+OUTBOX_TEMPLATE_HEADER = "X-Outreach-Template"
+
+def message_from_composed(msg: dict) -> EmailMessage:
+    """The full EmailMessage for a compose_email_from_row() dict, as written to the outbox."""
+    m = build_message(msg["to"], msg["subject"], msg["body"], cced=msg["cc_flag"])
+    m["Date"] = formatdate(localtime=True)
+    m[OUTBOX_KEY_HEADER] = msg["key"]
+    m[OUTBOX_TEMPLATE_HEADER] = msg["template"]
+    return m
+
+def _render_row(row, tpl_path, cc_default, row_template):
+    # module-level so process pools can pickle it
+    msg = compose_email_from_row(row, tpl_path, cc_default, row_template=row_template)
+    return msg["key"], message_from_composed(msg).as_bytes()
+
+def render_outbox(contacts_path: Path, tpl_path: Path, out_path: Path, sent_log=None, cc_default=False,
+                  row_template=True, jobs=1, chunk=500) -> int:
+    """
+    Non-interactive render of every message that would be sent (already-sent
+    rows skipped if `sent_log` is given). `out_path` ending in .mbox gets a
+    single mbox (replaced if it exists); anything else is a folder of
+    NNNNNN-<key>.eml files, numbered in CSV order (.eml files from an earlier
+    render there are removed first). With jobs > 1, rows are
+    composed across a process pool in chunks so memory stays bounded.
+    Returns the number of messages written.
+    """
+    import functools
+    import itertools
+    import mailbox
+    import multiprocessing
+
+    out_path = Path(out_path)
+    as_mbox = out_path.suffix.lower() == ".mbox"
+    items = stage_dedupe(stage_keys(load_prospects_from_path(Path(contacts_path))), sent_log or ())
+    rows = (row for _, row in items)
+    render = functools.partial(_render_row, tpl_path=Path(tpl_path), cc_default=cc_default, row_template=row_template)
+
+    if as_mbox:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.unlink(missing_ok=True)
+        box = mailbox.mbox(str(out_path))
+    else:
+        out_path.mkdir(parents=True, exist_ok=True)
+        for old in out_path.glob("*.eml"):  # numbering restarts, so stale copies wouldn't be overwritten
+            old.unlink()
+    pool = multiprocessing.Pool(jobs) if jobs > 1 else None
+    n = 0
+    try:
+        while True:
+            batch = list(itertools.islice(rows, chunk))
+            if not batch:
+                break
+            if pool is not None:
+                results = pool.map(render, batch, chunksize=max(1, len(batch) // (jobs * 4)))
+            else:
+                results = map(render, batch)
+            for key, data in results:
+                n += 1
+                if as_mbox:
+                    box.add(data)
+                else:
+                    safe = re.sub(r"[^A-Za-z0-9._-]+", "_", key)
+                    (out_path / f"{n:06d}-{safe}.eml").write_bytes(data)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if as_mbox:
+            box.close()
+    return n
+
+def iter_outbox(outbox_dir: Path, sent_log=None):
+    """
+    Yield SendEngine-ready dicts for the .eml files left in an outbox folder
+    (delete the ones you don't approve), skipping keys already in sent_log
+    or already yielded.
+    """
+    from email import policy
+    from email.parser import BytesParser
+
+    parser = BytesParser(policy=policy.default)
+    seen = set()
+    for path in sorted(Path(outbox_dir).glob("*.eml")):
+        m = parser.parsebytes(path.read_bytes())
+        key = m[OUTBOX_KEY_HEADER]
+        if key and (key in seen or (sent_log is not None and key in sent_log)):
+            continue
+        seen.add(key)
+        template = m[OUTBOX_TEMPLATE_HEADER]
+        del m[OUTBOX_KEY_HEADER], m[OUTBOX_TEMPLATE_HEADER]
+        yield {"key": key or path.stem, "to": m["To"], "cc_flag": bool(m["Cc"]), "template": template, "eml": m}
+
+
+# --------- Spool: durable send queue that survives crashes
+_SPOOL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id       INTEGER PRIMARY KEY,
+    key      TEXT NOT NULL UNIQUE,
+    cced     INTEGER NOT NULL DEFAULT 0,
+    template TEXT,
+    message  BLOB NOT NULL,
+    state    TEXT NOT NULL DEFAULT 'queued',   -- queued / in-flight / sent / failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error    TEXT,
+    updated  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spool_state ON spool (state, id);
+"""
+
+class Spool:
+    """
+    On-disk send queue living in the SQLite sent ledger. Each message is
+    enqueued once (by dedupe key) as rendered bytes and moves through
+    queued -> in-flight -> sent | failed. The in-flight mark is committed
+    before the message goes out, and 'sent' is committed in the same
+    transaction as the sent-ledger row, so a crash can never cause a resend:
+    after a restart the worker picks up the queued rows, and anything left
+    in-flight is reported for a human to check (requeue() it to retry).
+    A message whose connection dropped after DATA (DeliveryUnknown) stays
+    in-flight too.
+    """
+    def __init__(self, ledger_path: Path):
+        import sqlite3
+        self.path = Path(ledger_path)
+        if self.path.suffix.lower() == ".csv":
+            raise ValueError("The spool needs the SQLite sent ledger (a .db log path), not a CSV log.")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_LEDGER_SCHEMA + _SPOOL_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc).isoformat()
+
+    def enqueue(self, messages, batch=500) -> int:
+        """Spool composed messages (compose_email_from_row dicts). Keys already spooled are ignored."""
+        import itertools
+        added = 0
+        messages = iter(messages)
+        while True:
+            chunk = list(itertools.islice(messages, batch))
+            if not chunk:
+                return added
+            rows = [
+                (m["key"], int(bool(m["cc_flag"])), m.get("template"),
+                 build_message(m["to"], m["subject"], m["body"], cced=m["cc_flag"]).as_bytes(), self._now())
+                for m in chunk
+            ]
+            with self._lock, self._db:
+                before = self._db.total_changes
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO spool (key, cced, template, message, updated) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                added += self._db.total_changes - before
+
+    def queued(self, page=200):
+        """Yield SendEngine-ready dicts for queued messages, oldest first."""
+        from email import policy
+        from email.parser import BytesParser
+
+        parser = BytesParser(policy=policy.default)
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, key, cced, template, message FROM spool WHERE state = 'queued' AND id > ? "
+                    "ORDER BY id LIMIT ?", (last, page)
+                ).fetchall()
+            if not rows:
+                return
+            for sid, key, cced, template, data in rows:
+                last = sid
+                m = parser.parsebytes(data)
+                yield {"spool_id": sid, "key": key, "to": m["To"], "cc_flag": bool(cced),
+                       "template": template, "eml": m}
+
+    def mark_in_flight(self, msg):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE spool SET state = 'in-flight', attempts = attempts + 1, updated = ? WHERE id = ?",
+                (self._now(), msg["spool_id"]),
+            )
+
+    def mark_sent(self, msg):
+        now = self._now()
+        with self._lock, self._db:
+            self._db.execute("UPDATE spool SET state = 'sent', error = NULL, updated = ? WHERE id = ?",
+                             (now, msg["spool_id"]))
+            self._db.execute(
+                "INSERT INTO sent (key, cced, timestamp, template, message_id, status) VALUES (?, ?, ?, ?, ?, 'sent')",
+                (msg["key"], int(bool(msg["cc_flag"])), now, msg.get("template"), msg.get("message_id")),
+            )
+
+    def mark_failed(self, msg, exc):
+        if isinstance(exc, DeliveryUnknown):
+            # may have gone out: leave it in-flight for a human, like a crash mid-send
+            with self._lock, self._db:
+                self._db.execute("UPDATE spool SET error = ?, updated = ? WHERE id = ?",
+                                 (str(exc), self._now(), msg["spool_id"]))
+            return
+        with self._lock, self._db:
+            self._db.execute("UPDATE spool SET state = 'failed', error = ?, updated = ? WHERE id = ?",
+                             (str(exc), self._now(), msg["spool_id"]))
+
+    def requeue(self, state: str) -> int:
+        """Move every message in `state` ('in-flight' or 'failed') back to queued."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE spool SET state = 'queued', updated = ? WHERE state = ?", (self._now(), state)
+            ).rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM spool GROUP BY state").fetchall()
+        return {state: n for state, n in rows}
+
+
+def send_spool(spool: Spool, workers=1, rate=0.5, burst=1, jitter=0.0, progress=print) -> SendEngine:
+    """Send everything queued in the spool; returns the finished SendEngine for its counts."""
+    engine = SendEngine(
+        workers=workers, rate=rate, burst=burst, jitter=jitter,
+        on_start=spool.mark_in_flight, on_sent=spool.mark_sent, on_failed=spool.mark_failed, progress=progress,
+    )
+    with engine:
+        for msg in spool.queued():
+            engine.submit(msg)
+    if engine.error is not None:
+        raise RuntimeError(f"Sending stopped: {engine.error}") from engine.error
+    return engine
+
+
+async def send_batch_async(contacts_path: Path, tpl_path: Path, log_path: Path, cc_default=False,
+                           row_template=True, workers=1, rate=0.5, burst=1, jitter=0.0, queue_size=None,
+                           check=True):
+    """
+    asyncio version of the compose -> dedupe -> send -> log pipeline.
+
+    One producer reads and composes rows into a bounded asyncio.Queue while
+    `workers` consumers send. smtplib is blocking, so each consumer runs its
+    SMTPSession in a worker thread (asyncio.to_thread) and composing keeps
+    going while the network round-trips are in flight. The bounded queue
+    keeps memory flat however long the contact list is.
+
+    Run from the CLI with asyncio.run(...), or schedule it on a background
+    event loop. Raises ValueError if preflight() finds problems (pass
+    check=False if you already ran it). Returns {"sent", "already", "failed"}
+    counts.
+    """
+    import asyncio
+
+    if check:
+        errors, unknown = preflight(contacts_path, tpl_path, row_template=row_template)
+        if errors:
+            raise ValueError("Preflight failed:\n" + "\n".join(errors))
+        for k, n in sorted(unknown.items()):
+            print(f"Unknown template '{k}' ({n} rows): using {Path(tpl_path).name} instead.")
+
+    sent_log = open_sent_log(log_path)
+    limiter = TokenBucket(rate, burst, jitter)
+    workers = max(1, int(workers))
+    q = asyncio.Queue(maxsize=queue_size or workers * 4)
+    stats = {"sent": 0, "already": 0, "failed": 0}
+    fatal = []  # SMTPConnectFailed from any consumer: stop the batch
+
+    def skipped(key):
+        stats["already"] += 1
+
+    async def produce():
+        try:
+            for msg in stream_messages(contacts_path, tpl_path, sent_log, cc_default,
+                                       row_template=row_template, on_skip=skipped):
+                if fatal:
+                    break
+                await q.put(msg)
+        finally:
+            # even if a bad row stops us: the consumers finish (and log) what is queued
+            for _ in range(workers):
+                await q.put(None)
+
+    async def consume():
+        smtp = SMTPSession()
+        try:
+            while True:
+                msg = await q.get()
+                if msg is None:
+                    return
+                if fatal:  # keep draining so the producer isn't stuck on a full queue
+                    stats["failed"] += 1
+                    continue
+                await limiter.acquire_async()
+                try:
+                    mid = await asyncio.to_thread(
+                        send_mail, msg["to"], msg["subject"], msg["body"], msg["cc_flag"], smtp
+                    )
+                except Exception as e:
+                    print(f"Failed to send to {msg['to']}: {e}")
+                    stats["failed"] += 1
+                    if isinstance(e, SMTPConnectFailed):
+                        fatal.append(e)
+                    continue
+                # log writes all happen on the loop thread, so they never interleave
+                sent_log.record(msg["key"], msg["cc_flag"], template=msg["template"], message_id=mid)
+                stats["sent"] += 1
+        finally:
+            await asyncio.to_thread(smtp.close)
+
+    tasks = [asyncio.create_task(produce())] + [asyncio.create_task(consume()) for _ in range(workers)]
+    try:
+        # return_exceptions: a producer error mustn't cancel consumers mid-send, which
+        # would deliver messages without logging them
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        for t in tasks:
+            t.cancel()  # only matters if we were cancelled ourselves
+        sent_log.close()
+    for r in results:
+        if isinstance(r, BaseException):
+            raise r
+    if fatal:
+        raise RuntimeError(f"Sending stopped: {fatal[0]}") from fatal[0]
+    return stats
+
+
+
+# --------- Library API ---------
+# What `python outreach/mailer_gmail.py ...` does, as functions that return
+# plain dicts, so cli.py and gui.py can run sends in-process (and keep the
+# template cache, registry and SMTP setup warm between calls).
+
+def print_preview(msg: dict):
+    to_addr, subj, body, cc_flag = msg["to"], msg["subject"], msg["body"], msg["cc_flag"]
+    print(f"Would send to {to_addr}{' (CC: Edwin)' if cc_flag else ''}")
+    print("\n--- Email Preview ---")
+    print(f"To     : {to_addr}")
+    if cc_flag:
+        print("Cc     : el52@rice.edu")
+    print(f"Subject: {subj}")
+    print(f"Body   :\n{body}")
+    print("---------------------\n")
+
+def _failures(engine):
+    return [(msg["key"], str(e)) for msg, e in engine.failed]
+
+def send_batch(contacts_path: Path, tpl_path: Path, log_path: Path, cc_default=False, row_template=False,
+               workers=1, rate=0.5, burst=1, jitter=1.0, on_message=None, confirm=None, on_skip=None,
+               check=True, progress=print, cancel=None, on_sent=None, on_failed=None) -> dict:
+    """
+    Compose, dedupe against the sent log, send and log every prospect; `cancel`
+    (a threading.Event) stops after the message in flight. Returns {"sent",
+    "failed" [(key, error)], "already", "declined", "cancelled", "dropped",
+    "seconds", "report"}.
+    """
+    contacts_path, tpl_path = Path(contacts_path), Path(tpl_path)
+    if check:
+        errors, unknown = preflight(contacts_path, tpl_path, row_template=row_template)
+        if errors:
+            raise ValueError("Preflight failed:\n" + "\n".join(errors))
+        for k, n in sorted(unknown.items()):
+            progress(f"Unknown template '{k}' ({n} rows): using {tpl_path.name} instead.")
+
+    stats = {"already": 0, "declined": 0, "dropped": 0}
+
+    def skipped(key):
+        stats["already"] += 1
+        if on_skip is not None:
+            on_skip(key)
+
+    sent_log = open_sent_log(Path(log_path))
+    progress(f"Loaded {len(sent_log)} sent emails from log.")
+
+    def sent(m):
+        sent_log.record(m["key"], m["cc_flag"], template=m["template"], message_id=m["message_id"])
+        if on_sent is not None:
+            on_sent(m)
+
+    engine = SendEngine(workers=workers, rate=rate, burst=burst, jitter=jitter, on_sent=sent, on_failed=on_failed,
+                        progress=progress)
+    meter = StageMeter()
+    started = time.perf_counter()
+    with sent_log, engine:
+        # the template is compiled once and re-read only if it changes on disk
+        for msg in stream_messages(contacts_path, tpl_path, sent_log, cc_default,
+                                   row_template=row_template, meter=meter, on_skip=skipped):
+            if cancel is not None and cancel.is_set():
+                break
+            if on_message is not None:
+                on_message(msg)
+            if confirm is not None and not confirm(msg):
+                stats["declined"] += 1
+                continue
+            # rate limiting + logging happen in the engine
+            engine.submit(msg)
+        if cancel is not None and cancel.is_set():
+            stats["dropped"] = engine.discard_pending()
+    if engine.error is not None:
+        raise RuntimeError(f"Sending stopped: {engine.error}") from engine.error
+    elapsed = time.perf_counter() - started
+    meter.add("send", engine.sent, elapsed)
+    return {"sent": engine.sent, "failed": _failures(engine), **stats,
+            "cancelled": bool(cancel is not None and cancel.is_set()),
+            "seconds": elapsed, "report": meter.report()}
+
+def send_outbox(outbox_dir: Path, log_path: Path, workers=1, rate=0.5, burst=1, jitter=1.0, progress=print) -> dict:
+    """Send the .eml files in a rendered outbox (see render_outbox). Returns {"sent", "failed"}."""
+    with open_sent_log(Path(log_path)) as sent_log:
+        engine = SendEngine(
+            workers=workers, rate=rate, burst=burst, jitter=jitter, progress=progress,
+            on_sent=lambda m: sent_log.record(m["key"], m["cc_flag"], template=m["template"], message_id=m["message_id"]),
+        )
+        with engine:
+            for msg in iter_outbox(Path(outbox_dir), sent_log):
+                engine.submit(msg)
+    if engine.error is not None:
+        raise RuntimeError(f"Sending stopped: {engine.error}") from engine.error
+    return {"sent": engine.sent, "failed": _failures(engine)}
+
+def spool_batch(log_path: Path, contacts_path: Path = None, tpl_path: Path = None, cc_default=False,
+                requeue=(), workers=1, rate=0.5, burst=1, jitter=1.0, progress=print) -> dict:
+    """
+    Resumable send through the on-disk Spool: queue new prospects (if
+    contacts/template are given), put `requeue` states back, then send
+    whatever is queued. Returns {"spooled", "sent", "failed", "spool"}.
+    """
+    spooled = 0
+    with Spool(Path(log_path)) as spool:
+        for state in requeue:
+            progress(f"Requeued {spool.requeue(state)} {state} messages.")
+        if contacts_path is not None:
+            stuck = spool.counts().get("in-flight", 0)
+            if stuck:
+                progress(f"{stuck} messages were in flight when the last run stopped and may or may not "
+                         f"have gone out. Check your Sent folder, then re-run with --requeue in-flight to retry them.")
+            with open_sent_log(Path(log_path)) as sent_log:
+                spooled = spool.enqueue(stream_messages(Path(contacts_path), Path(tpl_path), sent_log,
+                                                        cc_default, row_template=False))
+            progress(f"Spooled {spooled} new emails.")
+        engine = send_spool(spool, workers, rate, burst, jitter, progress=progress)
+        unsure = sum(isinstance(e, DeliveryUnknown) for _, e in engine.failed)
+        if unsure:
+            progress(f"{unsure} messages lost the connection after being handed to the server and were left "
+                     f"in flight. Check your Sent folder, then re-run with --requeue in-flight to retry them.")
+        return {"spooled": spooled, "sent": engine.sent, "failed": _failures(engine), "spool": spool.counts()}
+
+
+def main(argv=None):
     import argparse
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("--template", required=True, help="Path to the .txt/.md template to use")
-    parser.add_argument("--contacts", required=True, help="Path to prospects CSV")
+    parser.add_argument("--template", help="Path to the .txt/.md template to use")
+    parser.add_argument("--contacts", help="Path to prospects CSV")
     parser.add_argument("--cc", type=int, default=0, help="1 to CC yourself, else 0")
-    parser.add_argument("--log", required=True, help="Path to sent-log CSV")
+    parser.add_argument("--log", required=True, help="Path to the sent log (.db ledger or legacy .csv)")
     g = parser.add_mutually_exclusive_group()
     g.add_argument("--dry-run", action="store_true", help="Preview without sending")
     g.add_argument("--preview", action="store_true", help="Alias for --dry-run")
-    args = parser.parse_args()
+    parser.add_argument("--workers", type=int, default=1, help="Parallel SMTP connections")
+    parser.add_argument("--rate", type=float, default=0.5, help="Max messages/sec across all workers (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=1, help="Messages allowed back to back before rate limiting")
+    parser.add_argument("--jitter", type=float, default=1.0, help="Extra random delay per message, in seconds")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio pipeline (no per-message preview)")
+    parser.add_argument("--outbox", help="Render everything to this folder of .eml files (or a .mbox file) instead of sending")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes to render with (--outbox only)")
+    parser.add_argument("--send-outbox", metavar="DIR", help="Send the .eml files left in a rendered outbox folder")
+    parser.add_argument("--spool", action="store_true",
+                        help="Queue messages in the on-disk spool first and send from it (resumable)")
+    parser.add_argument("--resume", action="store_true", help="Send what is left in the spool, no CSV needed")
+    parser.add_argument("--requeue", choices=["in-flight", "failed"], action="append", default=[],
+                        help="Put spooled messages in this state back in the queue (with --spool/--resume)")
+    args = parser.parse_args(argv)
+    if not (args.send_outbox or args.resume) and not (args.template and args.contacts):
+        parser.error("--template and --contacts are required (unless --send-outbox or --resume)")
+    if (args.spool or args.resume) and (args.dry_run or args.preview):
+        parser.error("--spool/--resume can't be combined with --dry-run")
 
     # Normalize flags (LOCAL to the CLI path)
     CC_SELF = bool(args.cc)
     DRY = bool(args.dry_run or args.preview)
-    TPL_PATH = Path(args.template)
-    CONTACTS_PATH = Path(args.contacts)
     LOG_PATH = Path(args.log)
+    rates = dict(workers=args.workers, rate=args.rate, burst=args.burst, jitter=args.jitter)
+    flush_on_sigterm()  # so the sent log is flushed even if we're killed
 
-    # sent log
-    # If you have load_sent_log(path): use it. Otherwise use the wrapper above.
-    sent_keys = load_sent_log_from_path(LOG_PATH)  # or load_sent_log(LOG_PATH)
-    print(f"Loaded {len(sent_keys)} sent emails from log.")
+    if args.send_outbox:
+        res = send_outbox(Path(args.send_outbox), LOG_PATH, **rates)
+        print(f"Sent {res['sent']} emails from {args.send_outbox} ({len(res['failed'])} failed).")
+        return 0
 
-    seen_keys = set()
+    if args.resume:
+        res = spool_batch(LOG_PATH, requeue=args.requeue, **rates)
+        print(f"Sent {res['sent']} emails ({len(res['failed'])} failed). Spool: {res['spool']}")
+        return 0
 
-    # prospects
-    # If you have load_prospects(path): use it. Otherwise use the wrapper above.
-    for p in load_prospects_from_path(CONTACTS_PATH):  # or load_prospects(CONTACTS_PATH)
-        key = f"{p['first_name'].lower()}::{p['last_name'].lower()}::{p['company_domain'].lower()}"
+    TPL_PATH = Path(args.template)
+    CONTACTS_PATH = Path(args.contacts)
 
-        if key in sent_keys or key in seen_keys:
-            print(f"Skipping {key} (already sent).")
-            continue
+    # every template/CSV mismatch up front, before the first connection
+    errors, _ = preflight(CONTACTS_PATH, TPL_PATH, row_template=False)
+    if errors:
+        print("Preflight failed:")
+        for e in errors:
+            print(f"  - {e}")
+        return 1
 
-        seen_keys.add(key)
+    if args.outbox:
+        with open_sent_log(LOG_PATH) as sent_log:
+            t0 = time.perf_counter()
+            n = render_outbox(CONTACTS_PATH, TPL_PATH, Path(args.outbox), sent_log=sent_log,
+                              cc_default=CC_SELF, row_template=False, jobs=args.jobs)
+        dt = time.perf_counter() - t0
+        print(f"Rendered {n} emails to {args.outbox} in {dt:.2f}s ({n / dt if dt else 0:,.0f}/s).")
+        return 0
 
-        # recipient + flags
-        to_addr = f"{p['first_name'].lower()}.{p['last_name'].lower()}@{p['company_domain']}"
-        cc_flag = is_truthy(p.get("cced")) if "cced" in p else CC_SELF  # CSV column wins; else CLI default
+    if args.spool:
+        res = spool_batch(LOG_PATH, CONTACTS_PATH, TPL_PATH, CC_SELF, requeue=args.requeue, **rates)
+        print(f"Sent {res['sent']} emails ({len(res['failed'])} failed). Spool: {res['spool']}")
+        return 0
 
-        # subject
-        subj = build_subject(p)
+    if args.use_async and not DRY:
+        import asyncio
+        stats = asyncio.run(send_batch_async(
+            CONTACTS_PATH, TPL_PATH, LOG_PATH, cc_default=CC_SELF, row_template=False, check=False, **rates,
+        ))
+        print(f"Sent {stats['sent']} emails, skipped {stats['already']} already sent, {stats['failed']} failed.")
+        return 0
 
-        # template text
-        # CLI template ALWAYS wins
-        template_text = load_template_from_path(TPL_PATH)
-        try:
-            body = template_text.format(**p)
-        except KeyError as e:
-            missing = str(e).strip("'")
-            raise KeyError(
-                f"Missing placeholder '{missing}' in CSV for template '{TPL_PATH.name}'. "
-                f"Add column '{missing}' or remove it from the template."
-            ) from e
-
-        print(f"Would send to {to_addr}{' (CC: Edwin)' if cc_flag else ''}")
-        print("\n--- Email Preview ---")
-        print(f"To     : {to_addr}")
-        if cc_flag:
-            print("Cc     : el52@rice.edu")
-        print(f"Subject: {subj}")
-        print(f"Body   :\n{body}")
-        print("---------------------\n")
-
-        if DRY:
-            confirm = input("Send this email? (y/n): ").strip().lower()
-            if confirm != "y":
-                print("Skipped.\n")
-                continue
+    def confirm(msg):
+        if input("Send this email? (y/n): ").strip().lower() != "y":
+            print("Skipped.\n")
+            return False
+        return True
+
+    # CLI template ALWAYS wins (row_template=False)
+    res = send_batch(
+        CONTACTS_PATH, TPL_PATH, LOG_PATH, CC_SELF, row_template=False, check=False, **rates,
+        on_message=print_preview, confirm=confirm if DRY else None,
+        on_skip=lambda key: print(f"Skipping {key} (already sent)."),
+    )
+    print(f"Sent {res['sent']} emails ({len(res['failed'])} failed).")
+    print("Pipeline throughput:\n" + res["report"])
+    return 0
 
-        send_mail(to_addr, subj, body, cced=cc_flag)
-        append_to_log_path(LOG_PATH, key, cc_flag)  # or append_to_log(LOG_PATH, key, cc_flag)
 
-        delay = random.uniform(1.0, 3.0)
-        print(f"Sleeping for {delay:.2f} seconds...\n")
-        time.sleep(delay)
+if __name__ == "__main__":
+    raise SystemExit(main())